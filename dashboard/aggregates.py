@@ -0,0 +1,186 @@
+"""Tabel agregat (cube) untuk tab "Dashboard Utama".
+
+Cube menyimpan jumlah baris dan jumlah/hitungan price, freight_value, dan
+delivery_time per (bulan, hari, jam, kategori produk). Semua grafik tren waktu
+dan perbandingan kategori diturunkan dari cube ini, sehingga biayanya tidak
+bergantung pada banyaknya baris order.
+
+``build_cube`` dan ``build_totals`` bekerja pada kode integer (kode waktu
+pembelian dari ``time_codes``, kode kategori, key order) dengan ``np.bincount``,
+sehingga cukup cepat untuk dihitung ulang pada setiap irisan filter.
+
+Build step: ``python aggregates.py merged_data.csv [pandas|duckdb]``
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data_store import cache_paths, data_meta, is_current, read_meta, write_parquet
+from queries import CUBE_QUERY, DERIVED_COLUMNS, get_backend, normalize_result, order_totals
+from rfm import NAT, NS_PER_DAY, category_codes, month_codes
+
+# Kunci cube
+CUBE_KEYS = list(CUBE_QUERY.keys)
+
+# Urutan hari dalam seminggu (dayofweek 0 = Senin)
+DAYS_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Batas jam untuk kategori waktu dalam sehari
+TIME_OF_DAY_LABELS = ['Pagi', 'Siang', 'Sore', 'Malam']
+
+# Akhiran nama file cache untuk cube
+CUBE_SUFFIX = '.cube'
+
+# Kolom kode waktu pembelian yang dihitung sekali saat dataset dimuat (lihat time_codes)
+TIME_CODE_COLUMNS = ['purchase_month', 'purchase_weekday', 'purchase_hour']
+
+NS_PER_HOUR = 3600 * 10**9
+
+# 1970-01-01 (hari ke-0) adalah hari Kamis (dayofweek 3)
+EPOCH_WEEKDAY = 3
+
+
+def time_of_day(hours):
+    """Mengklasifikasikan jam pesanan ke dalam Pagi, Siang, Sore, dan Malam (vektor)."""
+    hours = np.asarray(hours, dtype='float64')
+    conditions = [(hours >= 6) & (hours < 12), (hours >= 12) & (hours < 18), (hours >= 18) & (hours < 24)]
+    return np.select(conditions, TIME_OF_DAY_LABELS[:3], default=TIME_OF_DAY_LABELS[3])
+
+
+def time_codes(timestamps):
+    """Kode bulan (tahun * 12 + bulan - 1), hari (0 = Senin), dan jam pembelian; -1 untuk NaT."""
+    ns = pd.Series(timestamps).to_numpy('datetime64[ns]').view('int64')
+    valid = ns != NAT
+    weekday = (ns // NS_PER_DAY + EPOCH_WEEKDAY) % 7
+    hour = (ns // NS_PER_HOUR) % 24
+    return (month_codes(timestamps), np.where(valid, weekday, -1).astype('int8'),
+            np.where(valid, hour, -1).astype('int8'))
+
+
+def _time_codes(merged_data):
+    # Kode yang sudah dihitung saat dataset dimuat dipakai langsung
+    if all(column in merged_data for column in TIME_CODE_COLUMNS):
+        return [merged_data[column].to_numpy() for column in TIME_CODE_COLUMNS]
+    return time_codes(merged_data['order_purchase_timestamp'])
+
+
+def build_cube(merged_data):
+    """Mengagregasi merged_data menjadi cube (bulan, hari, jam, kategori).
+
+    Keempat kunci digabung menjadi satu nomor sel, lalu setiap ukuran
+    dijumlahkan per sel dengan ``np.bincount``. Hasilnya sama dengan
+    ``CUBE_QUERY`` pada backend query.
+    """
+    month, weekday, hour = _time_codes(merged_data)
+    category, categories = category_codes(merged_data['product_category_name'])
+    valid_time = month >= 0
+
+    # Slot terakhir setiap kunci untuk NaT/NaN
+    first_month = int(month[valid_time].min()) if valid_time.any() else 0
+    n_months = (int(month[valid_time].max()) - first_month + 1 if valid_time.any() else 0) + 1
+    n_categories = len(categories) + 1
+    month_slot = np.where(valid_time, month - first_month, n_months - 1).astype('int64')
+    cell = ((month_slot * 7 + np.maximum(weekday, 0)) * 24 + np.maximum(hour, 0)) * n_categories \
+        + np.where(category >= 0, category, n_categories - 1)
+    size = n_months * 7 * 24 * n_categories
+
+    counts = np.bincount(cell, minlength=size)
+    present = np.flatnonzero(counts)
+    rest, category_slot = np.divmod(present, n_categories)
+    rest, hour_slot = np.divmod(rest, 24)
+    month_slot, weekday_slot = np.divmod(rest, 7)
+    no_time = month_slot == n_months - 1
+
+    delivery_time = merged_data['delivery_time'] if 'delivery_time' in merged_data \
+        else DERIVED_COLUMNS['delivery_time'][0](merged_data)
+    order_month = (month_slot + first_month - 1970 * 12).astype('datetime64[M]').astype('datetime64[ns]')
+    order_month[no_time] = np.datetime64('NaT')
+    cube = pd.DataFrame({
+        'order_month': order_month,
+        'weekday': np.where(no_time, np.nan, weekday_slot),
+        'order_hour': np.where(no_time, np.nan, hour_slot),
+        'product_category_name': pd.Categorical.from_codes(
+            np.where(category_slot == n_categories - 1, -1, category_slot), categories=categories),
+        'order_count': counts[present],
+    })
+    for name, column in (('price', merged_data['price']), ('freight', merged_data['freight_value']),
+                         ('delivery', delivery_time)):
+        values = column.to_numpy('float64')
+        known = ~np.isnan(values)
+        cube[f'{name}_sum'] = np.bincount(cell[known], weights=values[known], minlength=size)[present]
+        cube[f'{name}_count'] = np.bincount(cell[known], minlength=size)[present]
+    return normalize_result(cube, CUBE_QUERY)
+
+
+def build_totals(merged_data):
+    """Metrik ringkasan yang tidak bisa dijumlahkan dari cube (distinct order)."""
+    orders, uniques = category_codes(merged_data['order_id'])
+    return {
+        'total_orders': int(np.count_nonzero(np.bincount(orders[orders >= 0], minlength=len(uniques)))),
+        'total_revenue': float(merged_data['price'].sum()),
+        'row_count': len(merged_data),
+    }
+
+
+def load_aggregates(csv_path='merged_data.csv', cache_dir=None, backend=None, merged_data=None):
+    """Memuat cube dan totals dari cache, membangun ulang jika CSV sumber atau part batch berubah.
+
+    Saat membangun ulang, query dijalankan dengan ``backend`` ('pandas' atau
+    'duckdb'; default ``DASHBOARD_QUERY_BACKEND``). Backend pandas memakai
+    ``merged_data`` jika sudah dimuat pemanggil, alih-alih memuatnya lagi.
+    """
+    parquet_path, meta_path = cache_paths(csv_path, CUBE_SUFFIX, cache_dir)
+    meta = read_meta(meta_path)
+    if is_current(meta, csv_path, cache_dir) and os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path), meta['totals']
+
+    backend = get_backend(backend, csv_path, cache_dir, merged_data)
+    cube = backend.run(CUBE_QUERY)
+    totals = order_totals(backend)
+    write_parquet(cube, parquet_path, meta_path, {**data_meta(csv_path, cache_dir), 'totals': totals})
+    return cube, totals
+
+
+def monthly_order_trend(cube):
+    """Jumlah order per bulan dengan bulan dalam format "YYYY-MM"."""
+    trend = cube.groupby('order_month')['order_count'].sum().reset_index(name='Jumlah Order')
+    trend['order_month'] = trend['order_month'].dt.strftime('%Y-%m')
+    return trend
+
+
+def weekday_order_trend(cube):
+    """Jumlah order per hari dalam seminggu, diurutkan dari Senin."""
+    trend = cube.groupby('weekday')['order_count'].sum()
+    trend.index = pd.Categorical(np.asarray(DAYS_ORDER)[trend.index.astype(int)], categories=DAYS_ORDER, ordered=True)
+    trend = trend.rename_axis('day_of_week').reset_index(name='Jumlah Order')
+    return trend.sort_values('day_of_week')
+
+
+def time_of_day_order_trend(cube):
+    """Jumlah order per kategori waktu dalam sehari, diurutkan dari yang terbanyak."""
+    trend = cube.groupby(time_of_day(cube['order_hour']))['order_count'].sum().sort_values(ascending=False)
+    trend = trend.reset_index()
+    trend.columns = ['Waktu dalam Sehari', 'Jumlah Order']
+    return trend
+
+
+def category_stats(cube):
+    """Jumlah terjual, rata-rata harga, biaya pengiriman, dan waktu pengiriman per kategori."""
+    sums = cube.groupby('product_category_name', observed=True)[
+        ['order_count', 'price_sum', 'price_count', 'freight_sum', 'freight_count', 'delivery_sum', 'delivery_count']
+    ].sum()
+    return pd.DataFrame({
+        'count': sums['order_count'],
+        'avg_price': sums['price_sum'] / sums['price_count'],
+        'avg_freight': sums['freight_sum'] / sums['freight_count'],
+        'avg_delivery_time': sums['delivery_sum'] / sums['delivery_count'],
+    })
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else 'merged_data.csv'
+    backend = sys.argv[2] if len(sys.argv) > 2 else None
+    cube, totals = load_aggregates(source, backend=backend)
+    print(f"Cube: {len(cube)} baris dari {totals['row_count']} baris order")
@@ -0,0 +1,148 @@
+"""Benchmark headless untuk setiap tahap dashboard pada beberapa skala data.
+
+Untuk setiap skala, merged_data sintetis dibuat (atau dipakai ulang jika sudah
+ada) dengan ``synthetic_data.py``, lalu setiap tahap dashboard diukur waktu
+dan puncak memorinya (``tracemalloc``): baca CSV, parsing tanggal, tulis/baca
+Parquet, agregasi tab 1, skor RFM, penempelan segmen RFM, dan pembuatan grafik.
+Hasilnya ditulis sebagai JSON agar bisa dibandingkan antar commit.
+
+Pemakaian: ``python benchmark.py --scales 1 10 --output benchmark.json``
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+import pandas as pd
+import plotly
+import plotly.express as px
+
+from aggregates import build_cube, build_totals, category_stats, monthly_order_trend, time_of_day_order_trend, \
+    weekday_order_trend
+from data_store import DATETIME_COLUMNS, SCHEMA, apply_schema
+from dataset import add_derived_columns, customer_review_frequency
+from instrumentation import section
+from review_plots import review_box, review_scatter
+from rfm import attach_segments, compute_rfm, segment_crosstabs
+from synthetic_data import write_csv
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'benchmark')
+
+
+def measure(stages, name, func, memory=True):
+    """Menjalankan func sebagai satu bagian terukur; jumlah baris diambil dari hasilnya."""
+    with section(stages, name, memory=memory) as record:
+        result = func()
+        rows = result[0] if isinstance(result, tuple) else result
+        record['rows'] = len(rows) if hasattr(rows, '__len__') else None
+    peak = '' if record['peak_mb'] is None else f" {record['peak_mb']:10.1f} MB"
+    print(f"  {name:<20} {record['seconds']:8.3f} s{peak}")
+    return result
+
+
+def _read_raw_csv(csv_path):
+    # Tanpa parsing tanggal, agar biaya parsing terukur terpisah
+    dtypes = {column: dtype for column, dtype in SCHEMA.items() if column not in DATETIME_COLUMNS}
+    return pd.read_csv(csv_path, usecols=lambda column: column in SCHEMA, dtype=dtypes)
+
+
+def _tab1_tables(merged_data):
+    cube = build_cube(merged_data)
+    build_totals(merged_data)
+    monthly_order_trend(cube)
+    weekday_order_trend(cube)
+    time_of_day_order_trend(cube)
+    category_stats(cube)
+    return cube
+
+
+def _figures(merged_data, crosstabs):
+    # Grafik terberat di dashboard, diserialisasi seperti saat dikirim ke browser
+    labels = {'price': 'Harga Produk', 'review_score': 'Skor Ulasan', 'payment_type': 'Metode Pembayaran',
+              'bad_review': 'Ulasan Buruk', 'delivery_time': 'Durasi Pengiriman (hari)',
+              'purchase_count': 'Frekuensi Pembelian'}
+    figures = [
+        review_scatter(merged_data, 'price', 'review_score', 'Harga Produk vs Skor Ulasan', labels),
+        review_scatter(customer_review_frequency(merged_data), 'purchase_count', 'review_score',
+                       'Frekuensi Pembelian vs Skor Ulasan', labels),
+        review_box(merged_data, 'payment_type', 'review_score', 'Metode Pembayaran vs Skor Ulasan', labels),
+        review_box(merged_data, 'bad_review', 'delivery_time', 'Ulasan Buruk vs Durasi Pengiriman', labels,
+                   color_by_group=True),
+        px.line(crosstabs['month'], x='bulan_pembelian', y='jumlah_order', color='segment', markers=True),
+    ]
+    return [fig.to_json() for fig in figures]
+
+
+def run_scale(scale, seed=42, data_dir=None, memory=True):
+    """Mengukur semua tahap untuk satu skala; mengembalikan hasil per tahap."""
+    data_dir = data_dir or BENCHMARK_DIR
+    os.makedirs(data_dir, exist_ok=True)
+    csv_path = os.path.join(data_dir, f'merged_data_{scale:g}x_seed{seed}.csv')
+    if not os.path.exists(csv_path):
+        print(f"Membuat data sintetis skala {scale:g}x ...")
+        write_csv(csv_path + '.tmp', scale, seed)
+        os.replace(csv_path + '.tmp', csv_path)
+
+    print(f"Skala {scale:g}x ({csv_path})")
+    stages = []
+    raw = measure(stages, 'load_csv', lambda: _read_raw_csv(csv_path), memory)
+    merged_data = measure(stages, 'parse_datetime', lambda: apply_schema(raw), memory)
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    measure(stages, 'parquet_write', lambda: merged_data.to_parquet(parquet_path, index=False), memory)
+    merged_data = measure(stages, 'parquet_load', lambda: pd.read_parquet(parquet_path), memory)
+    merged_data = measure(stages, 'derived_columns', lambda: add_derived_columns(merged_data), memory)
+    measure(stages, 'tab1_aggregations', lambda: _tab1_tables(merged_data), memory)
+    RFM, _ = measure(stages, 'rfm_scoring', lambda: compute_rfm(merged_data), memory)
+
+    def rfm_joins():
+        merged_data['segment'] = attach_segments(merged_data, RFM)
+        return segment_crosstabs(merged_data)['month']
+
+    measure(stages, 'rfm_joins', rfm_joins, memory)
+    crosstabs = segment_crosstabs(merged_data)
+    payloads = measure(stages, 'figures', lambda: _figures(merged_data, crosstabs), memory)
+    stages[-1]['payload_bytes'] = sum(len(payload) for payload in payloads)
+
+    return {
+        'scale': scale,
+        'seed': seed,
+        'rows': len(merged_data),
+        'customers': len(RFM),
+        'csv_bytes': os.path.getsize(csv_path),
+        'total_seconds': round(sum(stage['seconds'] for stage in stages), 4),
+        'stages': stages,
+    }
+
+
+def environment():
+    """Versi Python dan pustaka utama, untuk membandingkan hasil antar mesin."""
+    import numpy
+
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': numpy.__version__,
+        'plotly': plotly.__version__,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark tahap-tahap dashboard pada data sintetis')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1], help='skala data, mis. 1 10 100')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=None, help='folder CSV sintetis (dipakai ulang antar run)')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--no-memory', action='store_true', help='tanpa tracemalloc (waktu lebih akurat)')
+    args = parser.parse_args()
+
+    report = {
+        'created_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'results': [run_scale(scale, args.seed, args.data_dir, not args.no_memory) for scale in args.scales],
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Laporan ditulis ke {args.output}")
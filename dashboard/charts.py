@@ -0,0 +1,295 @@
+"""Grafik dashboard sebagai fungsi biasa, terpisah dari Streamlit.
+
+Setiap grafik dibangun dari ``Dataset`` (lihat ``dataset.py``) dan pilihan
+widget-nya, sehingga grafik yang sama bisa dipakai oleh dashboard interaktif
+maupun laporan statis (``report.py``). ``CHARTS`` mendaftar semua grafik
+beserta seluruh varian pilihannya.
+"""
+import itertools
+from typing import NamedTuple
+
+import pandas as pd
+import plotly.express as px
+
+from aggregates import category_stats, monthly_order_trend, time_of_day_order_trend, weekday_order_trend
+from dataset import view_frame
+from review_plots import review_box, review_scatter, summary_box
+from rfm import SEGMENTS
+
+# Menetapkan warna khusus untuk setiap segmen RFM
+COLOR_MAP = {
+    "Gold": "#FFD700",    # Warna Gold
+    "Silver": "#C0C0C0",  # Warna Silver
+    "Bronze": "#CD7F32"   # Warna Bronze
+}
+
+# Pilihan selectbox setiap panel
+SOLD_OPTIONS = ["Terlaris", "Kurang Laku"]
+PRICE_OPTIONS = ["Tertinggi", "Terendah"]
+FREIGHT_OPTIONS = ["Tertinggi", "Terendah"]
+DELIVERY_OPTIONS = ["Tercepat", "Terlama"]
+REVIEW_METRICS = ["Harga Produk", "Biaya Pengiriman", "Durasi Pengiriman", "Metode Pembayaran", "Frekuensi Pembelian"]
+PRODUCT_OPTIONS = ["Produk Terlaris", "Produk Kurang Laku"]
+
+DELIVERY_REVIEW_TITLE = "Perbandingan Durasi Pengiriman untuk Ulasan Buruk vs Ulasan Baik"
+DELIVERY_REVIEW_LABELS = {'bad_review': 'Ulasan Buruk (1 = Ya, 0 = Tidak)', 'delivery_time': 'Durasi Pengiriman (hari)'}
+DELIVERY_REVIEW_COLORS = ["#FF4136", "#0074D9"]
+
+
+def top_categories(dataset, column, ascending, n=10):
+    """n kategori teratas dari statistik kategori di cube, diurutkan sesuai ascending."""
+    ranked = category_stats(dataset.order_cube)[column].sort_values(ascending=ascending)
+    return ranked.head(n)
+
+
+def category_bar(categories, title, x_label):
+    """Bar chart horizontal untuk Series kategori -> nilai."""
+    return px.bar(categories, x=categories.values, y=categories.index,
+                  orientation='h', title=title, labels={"x": x_label, "y": "Kategori Produk"})
+
+
+def monthly_trend_figure(dataset):
+    """Tren jumlah order per bulan."""
+    # Menghitung jumlah pesanan per bulan dari cube (bulan dalam format "YYYY-MM")
+    monthly_trend = monthly_order_trend(dataset.order_cube)
+
+    fig = px.line(monthly_trend, x='order_month', y='Jumlah Order', markers=True,
+                  title="Tren Total Order Berdasarkan Bulan")
+    fig.update_layout(xaxis_title="Bulan", yaxis_title="Jumlah Order", xaxis_tickformat='%Y-%m')
+    fig.update_xaxes(tickangle=45)  # Mengatur rotasi label bulan agar lebih terbaca
+    return fig
+
+
+def weekday_trend_figure(dataset):
+    """Jumlah order berdasarkan hari dalam seminggu (Senin muncul duluan)."""
+    daily_order_trend_weekday = weekday_order_trend(dataset.order_cube)
+    fig = px.bar(daily_order_trend_weekday, x='day_of_week', y='Jumlah Order',
+                 title="Tren Total Order Berdasarkan Hari dalam Seminggu")
+    fig.update_layout(xaxis_title="Hari", yaxis_title="Jumlah Order")
+    return fig
+
+
+def time_of_day_figure(dataset):
+    """Jumlah order per kategori waktu dalam sehari (pagi, siang, sore, malam)."""
+    time_of_day_trend = time_of_day_order_trend(dataset.order_cube)
+    fig = px.bar(time_of_day_trend, x='Waktu dalam Sehari', y='Jumlah Order',
+                 title="Tren Total Order Berdasarkan Waktu dalam Sehari")
+    fig.update_layout(xaxis_title="Waktu dalam Sehari", yaxis_title="Jumlah Order")
+    return fig
+
+
+def sold_figure(dataset, sold_option):
+    """10 kategori terlaris atau kurang laku."""
+    if sold_option == "Terlaris":
+        # Ambil 10 kategori dengan penjualan terbanyak
+        categories = top_categories(dataset, 'count', ascending=False).sort_values(ascending=True)
+        return category_bar(categories, "Kategori Produk Terlaris", "Jumlah Terjual")
+    # Ambil 10 kategori dengan penjualan paling sedikit
+    categories = top_categories(dataset, 'count', ascending=True).sort_values(ascending=True)
+    return category_bar(categories, "Kategori Produk Kurang Laku", "Jumlah Terjual")
+
+
+def price_figure(dataset, price_option):
+    """10 kategori dengan harga rata-rata tertinggi atau terendah."""
+    if price_option == "Tertinggi":
+        categories = top_categories(dataset, 'avg_price', ascending=False).sort_values(ascending=True)
+        return category_bar(categories, "Kategori Produk Berdasarkan Harga Rata-Rata Tertinggi", "Harga Rata-Rata")
+    categories = top_categories(dataset, 'avg_price', ascending=True).sort_values(ascending=True)
+    return category_bar(categories, "Kategori Produk Berdasarkan Harga Rata-Rata Terendah", "Harga Rata-Rata")
+
+
+def freight_figure(dataset, freight_option):
+    """10 kategori dengan biaya pengiriman rata-rata tertinggi atau terendah."""
+    if freight_option == "Tertinggi":
+        categories = top_categories(dataset, 'avg_freight', ascending=False).sort_values(ascending=True)
+        return category_bar(categories, "Kategori Produk Berdasarkan Biaya Pengiriman Rata-Rata Tertinggi",
+                            "Biaya Pengiriman Rata-Rata")
+    categories = top_categories(dataset, 'avg_freight', ascending=True).sort_values(ascending=True)
+    return category_bar(categories, "Kategori Produk Berdasarkan Biaya Pengiriman Rata-Rata Terendah",
+                        "Biaya Pengiriman Rata-Rata")
+
+
+def delivery_figure(dataset, delivery_option):
+    """10 kategori dengan waktu pengiriman tercepat atau terlama."""
+    if delivery_option == "Tercepat":
+        # Mengambil 10 kategori dengan waktu pengiriman tercepat
+        categories = top_categories(dataset, 'avg_delivery_time', ascending=True)
+        return category_bar(categories, "Kategori Produk dengan Waktu Pengiriman Tercepat",
+                            "Rata-Rata Waktu Pengiriman (hari)")
+    # Mengambil 10 kategori dengan waktu pengiriman terlama
+    categories = top_categories(dataset, 'avg_delivery_time', ascending=False).sort_values(ascending=True)
+    return category_bar(categories, "Kategori Produk dengan Waktu Pengiriman Terlama",
+                        "Rata-Rata Waktu Pengiriman (hari)")
+
+
+def review_factor_figure(dataset, selected_metric):
+    """Grafik skor ulasan untuk satu pilihan matriks."""
+    # Plot berdasarkan pilihan matriks. Untuk data besar, scatter diganti grid densitas
+    # dan box plot dibangun dari ringkasan kuartil yang dihitung di server. Hanya dua
+    # kolom yang dipakai grafik yang diambil untuk baris dataset.
+    if selected_metric == "Harga Produk":
+        return review_scatter(view_frame(dataset, ['price', 'review_score']), x='price', y='review_score',
+                              title="Harga Produk vs Skor Ulasan",
+                              labels={'price': 'Harga Produk', 'review_score': 'Skor Ulasan'})
+    if selected_metric == "Biaya Pengiriman":
+        return review_scatter(view_frame(dataset, ['freight_value', 'review_score']), x='freight_value', y='review_score',
+                              title="Biaya Pengiriman vs Skor Ulasan",
+                              labels={'freight_value': 'Biaya Pengiriman', 'review_score': 'Skor Ulasan'},
+                              color="green")
+    if selected_metric == "Durasi Pengiriman":
+        return review_scatter(view_frame(dataset, ['delivery_time', 'review_score']), x='delivery_time', y='review_score',
+                              title="Durasi Pengiriman vs Skor Ulasan",
+                              labels={'delivery_time': 'Durasi Pengiriman (hari)', 'review_score': 'Skor Ulasan'},
+                              color="orange")
+    if selected_metric == "Metode Pembayaran":
+        return review_box(view_frame(dataset, ['payment_type', 'review_score']), x='payment_type', y='review_score',
+                          title="Metode Pembayaran vs Skor Ulasan",
+                          labels={'payment_type': 'Metode Pembayaran', 'review_score': 'Skor Ulasan'},
+                          color_discrete_sequence=["#2ca02c"])
+    # Frekuensi pembelian pelanggan dan skor ulasan rata-rata per pelanggan (dihitung sekali saat dimuat)
+    return review_scatter(dataset.customer_review_freq, x='purchase_count', y='review_score',
+                          title="Frekuensi Pembelian vs Skor Ulasan",
+                          labels={'purchase_count': 'Frekuensi Pembelian', 'review_score': 'Skor Ulasan'},
+                          color="purple")
+
+
+def delivery_by_review(dataset, sketch=None):
+    """Rata-rata durasi pengiriman untuk ulasan buruk dan ulasan baik.
+
+    Jika ``sketch`` (ringkasan t-digest dari ``sketches.summary``) diberikan,
+    rata-rata diambil dari sketch.
+    """
+    if sketch is not None:
+        return sketch['delivery_time_bad']['mean'], sketch['delivery_time_good']['mean']
+    merged_data = view_frame(dataset, ['bad_review', 'delivery_time'])
+    avg_delivery_bad_review = merged_data[merged_data['bad_review'] == 1]['delivery_time'].mean()
+    avg_delivery_good_review = merged_data[merged_data['bad_review'] == 0]['delivery_time'].mean()
+    return avg_delivery_bad_review, avg_delivery_good_review
+
+
+def delivery_by_review_figure(dataset, sketch=None):
+    """Box plot durasi pengiriman untuk ulasan buruk vs ulasan baik (dari sketch jika diberikan)."""
+    if sketch is not None:
+        summary = pd.DataFrame([{'bad_review': 0, **sketch['delivery_time_good']},
+                                {'bad_review': 1, **sketch['delivery_time_bad']}])
+        fig = summary_box(summary, x='bad_review', y='delivery_time', title=DELIVERY_REVIEW_TITLE + " (perkiraan)",
+                          labels=DELIVERY_REVIEW_LABELS, color_by_group=True,
+                          color_discrete_sequence=DELIVERY_REVIEW_COLORS)
+    else:
+        fig = review_box(view_frame(dataset, ['bad_review', 'delivery_time']), x='bad_review', y='delivery_time',
+                         color_by_group=True, color_discrete_sequence=DELIVERY_REVIEW_COLORS, title=DELIVERY_REVIEW_TITLE,
+                         labels=DELIVERY_REVIEW_LABELS)
+
+    fig.update_layout(xaxis_title="Ulasan Buruk (1 = Ya, 0 = Tidak)", yaxis_title="Durasi Pengiriman (hari)")
+    return fig
+
+
+def rfm_segments_figure(dataset):
+    """Distribusi pelanggan per segmen RFM."""
+    # Menghitung jumlah pelanggan per segmen
+    segment_counts = dataset.RFM['segment'].value_counts().reset_index()
+    segment_counts.columns = ['Segment', 'Jumlah Pelanggan']
+
+    fig = px.bar(segment_counts, x='Segment', y='Jumlah Pelanggan', color='Segment',
+                 title="Distribusi Pelanggan berdasarkan Segmentasi RFM",
+                 labels={'Jumlah Pelanggan': 'Jumlah Pelanggan', 'Segment': 'Segmen Pelanggan'},
+                 color_discrete_map=COLOR_MAP)  # Menggunakan peta warna yang ditetapkan
+    fig.update_layout(xaxis_title="Segmen Pelanggan", yaxis_title="Jumlah Pelanggan")
+    return fig
+
+
+def segment_trend_figure(dataset):
+    """Tren jumlah order per bulan per segmen pelanggan."""
+    # Tabel silang segmen x bulan sudah dihitung sekali saat dataset dimuat
+    segmen_trend = dataset.segment_crosstabs['month']
+    fig = px.line(segmen_trend, x='bulan_pembelian', y='jumlah_order', color='segment', markers=True,
+                  title='Tren Order Berdasarkan Segmen Pelanggan',
+                  color_discrete_map=COLOR_MAP)  # Menggunakan peta warna yang ditetapkan
+    fig.update_layout(xaxis_title='Bulan Pembelian', yaxis_title='Jumlah Order', xaxis_tickangle=45)
+    return fig
+
+
+def segment_product_counts(dataset, selected_segment, product_option):
+    """5 kategori produk terlaris atau kurang laku untuk satu segmen pelanggan."""
+    # Jumlah produk yang dibeli per segmen dan kategori
+    top_categories_by_segment = dataset.segment_crosstabs['product_category_name']
+    segment_rows = top_categories_by_segment[top_categories_by_segment['segment'] == selected_segment]
+    if product_option == "Produk Terlaris":
+        # Mengambil 5 produk terlaris
+        return segment_rows.nlargest(5, 'count')
+    # Mengambil 5 produk kurang laku
+    return segment_rows.nsmallest(5, 'count')
+
+
+def segment_product_figure(dataset, selected_segment, product_option):
+    """Bar chart kategori produk terlaris/kurang laku untuk satu segmen."""
+    filtered_data = segment_product_counts(dataset, selected_segment, product_option)
+    fig = px.bar(filtered_data, x='count', y='product_category_name', orientation='h',
+                 title=f"{product_option} - Segmen {selected_segment}",
+                 labels={'count': 'Jumlah Pembelian', 'product_category_name': 'Kategori Produk'},
+                 color='segment',  # Menentukan segmen sebagai warna
+                 color_discrete_map=COLOR_MAP)  # Gunakan color_map untuk konsistensi warna
+
+    # Mengatur urutan kategori dan label pada grafik
+    fig.update_layout(yaxis={'categoryorder': 'total ascending'}, xaxis_title='Jumlah Pembelian',
+                      yaxis_title='Kategori Produk')
+    return fig
+
+
+def segment_payment_counts(dataset, selected_segment):
+    """Jumlah penggunaan setiap metode pembayaran untuk satu segmen pelanggan."""
+    payment_method_by_segment = dataset.segment_crosstabs['payment_type']
+    return payment_method_by_segment[payment_method_by_segment['segment'] == selected_segment]
+
+
+def segment_payment_figure(dataset, selected_segment):
+    """Bar chart metode pembayaran untuk satu segmen."""
+    filtered_data = segment_payment_counts(dataset, selected_segment)
+    fig = px.bar(filtered_data, x='count', y='payment_type', orientation='h',
+                 title=f"Metode Pembayaran - Segmen {selected_segment}",
+                 labels={'count': 'Jumlah Penggunaan', 'payment_type': 'Metode Pembayaran'},
+                 color='segment',  # Menentukan segmen sebagai warna
+                 color_discrete_map=COLOR_MAP)  # Gunakan color_map untuk konsistensi warna
+
+    # Mengatur urutan kategori dan label pada grafik
+    fig.update_layout(yaxis={'categoryorder': 'total ascending'}, xaxis_title='Jumlah Penggunaan',
+                      yaxis_title='Metode Pembayaran')
+    return fig
+
+
+class ChartSpec(NamedTuple):
+    name: str
+    function: object
+    options: tuple = ()
+
+    def variants(self):
+        """Semua kombinasi pilihan widget untuk grafik ini (tuple argumen)."""
+        return list(itertools.product(*self.options))
+
+
+# Semua grafik dashboard beserta pilihan widget-nya, sesuai urutan tampil
+CHARTS = {spec.name: spec for spec in [
+    ChartSpec('monthly_trend', monthly_trend_figure),
+    ChartSpec('weekday_trend', weekday_trend_figure),
+    ChartSpec('time_of_day_trend', time_of_day_figure),
+    ChartSpec('category_sold', sold_figure, (SOLD_OPTIONS,)),
+    ChartSpec('category_price', price_figure, (PRICE_OPTIONS,)),
+    ChartSpec('category_freight', freight_figure, (FREIGHT_OPTIONS,)),
+    ChartSpec('category_delivery_time', delivery_figure, (DELIVERY_OPTIONS,)),
+    ChartSpec('review_factors', review_factor_figure, (REVIEW_METRICS,)),
+    ChartSpec('delivery_by_review', delivery_by_review_figure),
+    ChartSpec('rfm_segments', rfm_segments_figure),
+    ChartSpec('rfm_segment_trend', segment_trend_figure),
+    ChartSpec('rfm_segment_products', segment_product_figure, (SEGMENTS, PRODUCT_OPTIONS)),
+    ChartSpec('rfm_segment_payments', segment_payment_figure, (SEGMENTS,)),
+]}
+
+
+def build_figure(dataset, name, *args):
+    """Grafik ``name`` untuk satu kombinasi pilihan widget."""
+    return CHARTS[name].function(dataset, *args)
+
+
+def chart_variants(names=None):
+    """Pasangan (nama grafik, tuple argumen) untuk semua varian grafik."""
+    return [(name, args) for name in (names or CHARTS) for args in CHARTS[name].variants()]
@@ -0,0 +1,333 @@
+"""Penyimpanan kolumnar bertipe untuk dataset ``merged_data``.
+
+CSV sumber hanya di-parse sekali, lalu disimpan sebagai Parquet dengan skema
+yang dideklarasikan (timestamp sebagai datetime, kategori dan id sebagai
+categorical). Pemuatan berikutnya langsung membaca Parquet selama sidik jari
+(fingerprint) file CSV sumber tidak berubah.
+
+Kolom id dan kategori disimpan di Parquet sebagai surrogate key int32;
+labelnya disimpan sekali di tabel dimensi (lihat ``dimensions.py``). Saat
+dimuat, kolom id (``KEY_COLUMNS``) tetap berupa key int32 (-1 untuk NaN) dan
+label id tidak dimuat sama sekali; kolom kategori berkardinalitas kecil
+menjadi Categorical yang kodenya adalah key dan kategorinya adalah tabel
+dimensinya. Label id dimuat terpisah dengan ``load_dimensions`` hanya untuk
+baris yang ditampilkan.
+
+Batch order baru dari ingest inkremental disimpan sebagai part Parquet
+tambahan dan ikut dimuat bersama data dasar sampai CSV sumber dibangun ulang.
+"""
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dimensions import Dimension, build_dimensions, decode_frame, dimension, dimension_from_table, display_table, \
+    encode_frame, extend_dimensions
+
+# Versi skema, dinaikkan setiap kali SCHEMA (atau representasinya) berubah agar cache lama dibangun ulang
+SCHEMA_VERSION = 4
+
+# Kolom tanggal yang disimpan sebagai datetime64
+DATETIME_COLUMNS = ['order_purchase_timestamp', 'order_delivered_customer_date']
+
+# Skema kolom dasar merged_data. Kolom turunan (order_month, day_of_week, dst.)
+# tidak disimpan karena dihitung ulang oleh dashboard.
+SCHEMA = {
+    'order_id': 'category',
+    'customer_id': 'category',
+    'customer_unique_id': 'category',
+    'customer_state': 'category',
+    'product_id': 'category',
+    'seller_id': 'category',
+    'seller_state': 'category',
+    'order_purchase_timestamp': 'datetime64[ns]',
+    'order_delivered_customer_date': 'datetime64[ns]',
+    'price': 'float64',
+    'freight_value': 'float64',
+    'product_category_name': 'category',
+    'payment_type': 'category',
+    'payment_value': 'float64',
+    'review_score': 'float32',
+}
+
+# Kolom yang disimpan sebagai surrogate key int32 dengan tabel dimensi
+DIMENSION_COLUMNS = [column for column, dtype in SCHEMA.items() if dtype == 'category']
+
+# Kolom id yang tetap berupa surrogate key int32 di merged_data yang dimuat
+KEY_COLUMNS = ['order_id', 'customer_id', 'customer_unique_id', 'product_id', 'seller_id']
+
+# Kolom dimensi berkardinalitas kecil yang dimuat sebagai Categorical berlabel
+LABEL_COLUMNS = [column for column in DIMENSION_COLUMNS if column not in KEY_COLUMNS]
+
+# Lokasi default cache, relatif terhadap folder CSV sumber
+CACHE_DIR_NAME = '.cache'
+
+# Akhiran folder cache untuk part batch baris baru
+DELTA_SUFFIX = '.deltas'
+
+# Akhiran folder cache untuk tabel dimensi
+DIMENSION_SUFFIX = '.dimensions'
+
+
+def source_fingerprint(csv_path):
+    """Sidik jari murah dari file sumber: ukuran, waktu modifikasi, dan versi skema."""
+    stat = os.stat(csv_path)
+    return {
+        'source': os.path.basename(csv_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'schema_version': SCHEMA_VERSION,
+    }
+
+
+def apply_schema(df):
+    """Mengonversi kolom-kolom yang dikenal ke tipe data pada SCHEMA."""
+    for column, dtype in SCHEMA.items():
+        if column not in df.columns:
+            continue
+        if column in DATETIME_COLUMNS:
+            df[column] = pd.to_datetime(df[column], format='ISO8601')
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def read_source_csv(csv_path):
+    """Membaca CSV sumber dengan tipe data eksplisit (tanpa kolom turunan)."""
+    dtypes = {column: dtype for column, dtype in SCHEMA.items() if column not in DATETIME_COLUMNS}
+    df = pd.read_csv(csv_path, usecols=lambda column: column in SCHEMA, dtype=dtypes)
+    return apply_schema(df)
+
+
+def cache_paths(csv_path, suffix='', cache_dir=None):
+    """Path file Parquet dan metadata JSON di folder cache untuk artefak turunan CSV."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME)
+    name = os.path.splitext(os.path.basename(csv_path))[0] + suffix
+    return os.path.join(cache_dir, f'{name}.parquet'), os.path.join(cache_dir, f'{name}.json')
+
+
+def read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_parquet(df, parquet_path, meta_path, meta):
+    """Menulis frame dan metadata JSON-nya secara atomik."""
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = parquet_path + '.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    write_meta(meta_path, meta)
+
+
+def write_meta(meta_path, meta):
+    """Menulis metadata JSON secara atomik."""
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def _cache_dir(csv_path, suffix, cache_dir):
+    return os.path.splitext(cache_paths(csv_path, suffix, cache_dir)[0])[0]
+
+
+def _dimension_files(directory, column):
+    # Tabel dimensi dasar lalu tambahan label dari ingest, urut menurut key
+    return [os.path.join(directory, f'{column}.parquet')] + \
+        sorted(glob.glob(os.path.join(directory, f'{column}-*.parquet')))
+
+
+def save_dimensions(dimensions, csv_path='merged_data.csv', cache_dir=None):
+    """Menyimpan tabel dimensi (satu file Parquet per kolom) untuk CSV sumber saat ini."""
+    directory = _cache_dir(csv_path, DIMENSION_SUFFIX, cache_dir)
+    for column, dim in dimensions.items():
+        path = os.path.join(directory, f'{column}.parquet')
+        os.makedirs(directory, exist_ok=True)
+        display_table(dim).to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        # Tambahan label milik tabel sebelumnya sudah termasuk di tabel baru
+        for appended in _dimension_files(directory, column)[1:]:
+            os.remove(appended)
+    write_meta(os.path.join(directory, 'meta.json'), source_fingerprint(csv_path))
+
+
+def _append_dimensions(dimensions, extended, csv_path, cache_dir):
+    # Hanya label baru yang ditulis sebagai file tambahan; tabel yang sudah ada tidak ditulis ulang
+    directory = _cache_dir(csv_path, DIMENSION_SUFFIX, cache_dir)
+    for column, dim in extended.items():
+        start = len(dimensions[column].labels)
+        if len(dim.labels) == start:
+            continue
+        path = os.path.join(directory, f'{column}-{len(_dimension_files(directory, column)):05d}.parquet')
+        display_table(dim, start=start).to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+
+
+def _read_dimensions(csv_path, cache_dir, columns):
+    # None jika tabel dimensi belum ada atau milik CSV sebelumnya
+    directory = _cache_dir(csv_path, DIMENSION_SUFFIX, cache_dir)
+    if read_meta(os.path.join(directory, 'meta.json')) != source_fingerprint(csv_path):
+        return None
+    dimensions = {}
+    for column in columns:
+        paths = _dimension_files(directory, column)
+        if not os.path.exists(paths[0]):
+            return None
+        table = pd.concat([pd.read_parquet(path, columns=['key', column]) for path in paths], ignore_index=True)
+        dimensions[column] = dimension_from_table(column, table)
+    return dimensions
+
+
+def _load_base(csv_path, cache_dir, columns=DIMENSION_COLUMNS):
+    # Path Parquet data dasar (ter-encode) dan dimensi kolom ``columns``; dibangun ulang jika CSV berubah
+    parquet_path, meta_path = cache_paths(csv_path, cache_dir=cache_dir)
+    fingerprint = source_fingerprint(csv_path)
+    if read_meta(meta_path) == fingerprint and os.path.exists(parquet_path):
+        dimensions = _read_dimensions(csv_path, cache_dir, columns)
+        if dimensions is not None:
+            return parquet_path, dimensions
+
+    df = read_source_csv(csv_path)
+    dimensions = build_dimensions(df, DIMENSION_COLUMNS)
+    # Dimensi ditulis lebih dulu; metadata data dasar yang terakhir menandai cache lengkap
+    save_dimensions(dimensions, csv_path, cache_dir)
+    write_parquet(encode_frame(df, dimensions), parquet_path, meta_path, fingerprint)
+    return parquet_path, {column: dimensions[column] for column in columns}
+
+
+def load_dimensions(csv_path='merged_data.csv', cache_dir=None, columns=None):
+    """Dimensi (label per surrogate key) untuk data dasar dan semua part batch baru.
+
+    ``columns`` membatasi dimensi yang dibaca, mis. ``['product_id']`` untuk
+    men-decode key produk pada baris yang ditampilkan.
+    """
+    return _load_base(csv_path, cache_dir, DIMENSION_COLUMNS if columns is None else columns)[1]
+
+
+def write_cache_from_parts(part_paths, csv_path, cache_dir=None):
+    """Memasang part Parquet bertipe (mis. hasil pipeline.py) sebagai cache data dasar CSV sumber.
+
+    Hanya kolom dimensi yang dibaca untuk membangun dimensi; setelah itu part
+    di-encode dan ditulis satu per satu, sehingga frame penuh tidak pernah dimuat.
+    """
+    labels = {}
+    for path in part_paths:
+        part = pd.read_parquet(path, columns=[column for column in DIMENSION_COLUMNS
+                                              if column in pq.read_schema(path).names])
+        for column in part:
+            labels.setdefault(column, []).append(dimension(column, part[column]).labels)
+    dimensions = {column: Dimension(column, pd.Index(np.concatenate(values), dtype=object).unique().sort_values())
+                  for column, values in labels.items()}
+    save_dimensions(dimensions, csv_path, cache_dir)
+
+    parquet_path, meta_path = cache_paths(csv_path, cache_dir=cache_dir)
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    writer = None
+    try:
+        for path in part_paths:
+            table = pa.Table.from_pandas(encode_frame(pd.read_parquet(path), dimensions), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path + '.tmp', table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(parquet_path + '.tmp', parquet_path)
+    write_meta(meta_path, source_fingerprint(csv_path))
+    return dimensions
+
+
+def _delta_dir(csv_path, cache_dir):
+    return _cache_dir(csv_path, DELTA_SUFFIX, cache_dir)
+
+
+def delta_parts(csv_path='merged_data.csv', cache_dir=None):
+    """Daftar part batch baris baru yang berlaku untuk CSV sumber saat ini."""
+    directory = _delta_dir(csv_path, cache_dir)
+    if read_meta(os.path.join(directory, 'meta.json')) != source_fingerprint(csv_path):
+        return []
+    return sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+
+
+def encode_rows(batch, csv_path='merged_data.csv', cache_dir=None):
+    """Batch baris baru (bertipe ``SCHEMA``) dalam representasi ``load_merged_data``.
+
+    Hanya dimensi kolom yang ada di batch yang dibaca. Nilai id/kategori baru
+    ditambahkan di akhir dimensi dan hanya label baru itu yang ditulis, sehingga
+    key di data dasar dan part sebelumnya tetap berlaku.
+    """
+    _, dimensions = _load_base(csv_path, cache_dir, [column for column in DIMENSION_COLUMNS if column in batch])
+    extended = extend_dimensions(dimensions, batch)
+    _append_dimensions(dimensions, extended, csv_path, cache_dir)
+    return decode_frame(encode_frame(batch, extended), extended, LABEL_COLUMNS)
+
+
+def append_rows(batch, csv_path='merged_data.csv', cache_dir=None):
+    """Menyimpan batch hasil ``encode_rows`` sebagai part Parquet tambahan di atas data dasar."""
+    _, dimensions = _load_base(csv_path, cache_dir, LABEL_COLUMNS)
+
+    directory = _delta_dir(csv_path, cache_dir)
+    meta_path = os.path.join(directory, 'meta.json')
+    fingerprint = source_fingerprint(csv_path)
+
+    # Part lama milik CSV sebelumnya sudah termasuk di CSV baru, jadi dibuang
+    if read_meta(meta_path) != fingerprint:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    part_path = os.path.join(directory, f'part-{len(delta_parts(csv_path, cache_dir)):05d}.parquet')
+    # Kolom id sudah berupa key; hanya Categorical berlabel yang di-encode kembali
+    write_parquet(encode_frame(batch, dimensions), part_path, meta_path, fingerprint)
+    return part_path
+
+
+def dataset_version(csv_path='merged_data.csv', cache_dir=None):
+    """Penanda versi dataset: sidik jari CSV sumber ditambah jumlah part batch baru."""
+    fingerprint = source_fingerprint(csv_path)
+    return f"{fingerprint['size']}-{fingerprint['mtime_ns']}-{SCHEMA_VERSION}-{len(delta_parts(csv_path, cache_dir))}"
+
+
+def data_meta(csv_path='merged_data.csv', cache_dir=None):
+    """Metadata untuk cache turunan: sidik jari CSV sumber dan jumlah part batch baru.
+
+    Cache yang metadatanya tidak sama dengan nilai saat ini (mis. karena proses
+    berhenti setelah part batch ditulis tetapi sebelum cache diperbarui) harus
+    dibangun ulang dari seluruh data.
+    """
+    return {'fingerprint': source_fingerprint(csv_path), 'parts': len(delta_parts(csv_path, cache_dir))}
+
+
+def is_current(meta, csv_path='merged_data.csv', cache_dir=None):
+    """True jika metadata cache turunan sesuai dengan data saat ini (lihat ``data_meta``)."""
+    return meta is not None and {key: meta.get(key) for key in ('fingerprint', 'parts')} == \
+        data_meta(csv_path, cache_dir)
+
+
+def parquet_files(csv_path='merged_data.csv', cache_dir=None):
+    """File Parquet (data dasar dan part batch baru) yang membentuk merged_data saat ini.
+
+    Kolom dimensi di file ini berupa surrogate key (lihat ``load_dimensions``).
+    Cache Parquet data dasar dibangun lebih dulu jika belum ada atau CSV berubah.
+    """
+    parquet_path, _ = _load_base(csv_path, cache_dir, columns=())
+    return [parquet_path] + delta_parts(csv_path, cache_dir)
+
+
+def load_merged_data(csv_path='merged_data.csv', cache_dir=None):
+    """Memuat merged_data bertipe, membangun ulang cache Parquet hanya jika CSV berubah.
+
+    Kolom id (``KEY_COLUMNS``) berupa key int32; label id tidak dimuat.
+    """
+    parquet_path, dimensions = _load_base(csv_path, cache_dir, LABEL_COLUMNS)
+    frames = [pd.read_parquet(path) for path in [parquet_path] + delta_parts(csv_path, cache_dir)]
+    # Key semua part memakai dimensi yang sama, jadi cukup digabung lalu di-decode sekali
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return decode_frame(df, dimensions)
@@ -0,0 +1,113 @@
+"""Dataset bersama (read-only) untuk semua sesi dashboard.
+
+Semua kolom turunan dan tabel ringkasan dihitung sekali saat dataset dimuat,
+lalu objek yang sama dipakai oleh setiap sesi Streamlit. Kode dashboard tidak
+boleh menambah atau mengubah kolom ``merged_data``; state per sesi cukup
+berupa pilihan widget.
+
+Dataset hasil filter tidak menyalin ``merged_data``: ia memakai frame bersama
+yang sama ditambah ``rows`` (posisi baris irisan), dan hanya menyimpan tabel
+hasil yang kecil. Grafik yang butuh baris mengambilnya lewat ``view_frame``.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from aggregates import TIME_CODE_COLUMNS, build_cube, build_totals, load_aggregates, time_codes
+from data_store import load_merged_data
+from incremental import load_customer_state
+from rfm import attach_segments, category_codes, customer_metrics, fit_rfm_bins, score_rfm, segment_crosstabs
+
+
+class Dataset(NamedTuple):
+    merged_data: pd.DataFrame
+    customer_review_freq: pd.DataFrame
+    order_cube: pd.DataFrame
+    order_totals: dict
+    RFM: pd.DataFrame
+    rfm_bins: dict
+    segment_crosstabs: dict
+    rows: np.ndarray = None
+
+
+# Kolom yang diambil dari irisan baris untuk menghitung ulang tabel dataset hasil filter
+SUBSET_COLUMNS = ['order_id', 'customer_unique_id', 'order_purchase_timestamp', 'price', 'freight_value',
+                  'delivery_time', 'review_score', 'product_category_name', 'payment_type'] + TIME_CODE_COLUMNS
+
+
+def add_derived_columns(merged_data):
+    """Menambahkan kolom turunan: delivery_time, bad_review, dan kode waktu pembelian."""
+    # Waktu pengiriman dalam hari
+    merged_data['delivery_time'] = (merged_data['order_delivered_customer_date'] - merged_data['order_purchase_timestamp']).dt.days
+    # Review buruk (skor 1 atau 2)
+    merged_data['bad_review'] = np.where(merged_data['review_score'] <= 2, 1, 0).astype('int8')
+    # Kode bulan, hari, dan jam pembelian dihitung sekali; cube dan tabel silang irisan filter memakainya
+    for column, codes in zip(TIME_CODE_COLUMNS, time_codes(merged_data['order_purchase_timestamp'])):
+        merged_data[column] = codes
+    return merged_data
+
+
+def customer_review_frequency(merged_data):
+    """Skor ulasan rata-rata dan frekuensi pembelian per pelanggan."""
+    codes, uniques = category_codes(merged_data['customer_unique_id'])
+    review = merged_data['review_score'].to_numpy('float64')
+    rows = codes >= 0
+    reviewed = rows & ~np.isnan(review)
+    purchased = rows & (category_codes(merged_data['order_id'])[0] >= 0)
+
+    # Jumlah per kode pelanggan dengan bincount, tanpa groupby
+    review_sum = np.bincount(codes[reviewed], weights=review[reviewed], minlength=len(uniques))
+    review_count = np.bincount(codes[reviewed], minlength=len(uniques))
+    purchase_count = np.bincount(codes[purchased], minlength=len(uniques))
+    present = np.bincount(codes[rows], minlength=len(uniques)) > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        review_score = np.where(review_count > 0, review_sum / review_count, np.nan)
+    return pd.DataFrame({
+        'review_score': review_score[present],
+        'purchase_count': purchase_count[present],
+    }, index=pd.Index(np.asarray(uniques)[present], name='customer_unique_id'))
+
+
+def load_dataset(csv_path='merged_data.csv', cache_dir=None):
+    """Memuat merged_data beserta kolom turunan, cube, totals, dan state RFM."""
+    merged_data = add_derived_columns(load_merged_data(csv_path, cache_dir))
+    # Jika cache agregat atau state RFM perlu dibangun ulang, frame yang sudah dimuat yang dipakai
+    order_cube, order_totals = load_aggregates(csv_path, cache_dir, merged_data=merged_data)
+    RFM, rfm_bins = load_customer_state(csv_path, cache_dir, merged_data=merged_data)
+
+    # Segmen RFM ditempel sekali sebagai kolom berkode integer; tabel silang segmen
+    # x bulan/kategori/metode pembayaran dihitung dalam satu kali proses
+    merged_data['segment'] = attach_segments(merged_data, RFM)
+    crosstabs = segment_crosstabs(merged_data)
+    return Dataset(merged_data, customer_review_frequency(merged_data), order_cube, order_totals, RFM, rfm_bins,
+                   crosstabs)
+
+
+def subset_dataset(dataset, rows):
+    """Dataset untuk sebagian baris merged_data; semua tabel dihitung ulang dari irisan.
+
+    Hanya kolom ``SUBSET_COLUMNS`` dari baris irisan yang diambil, dan hanya
+    untuk perhitungan ini. Dataset hasilnya memakai ``merged_data`` bersama
+    dengan ``rows``, dan RFM-nya hanya berisi kolom segment per key pelanggan.
+    RFM dihitung dari pelanggan di dalam irisan. Jika irisan terlalu kecil untuk
+    batas kuantil yang unik, batas kuantil dataset penuh yang dipakai.
+    """
+    merged_data = dataset.merged_data
+    sliced = merged_data[[column for column in SUBSET_COLUMNS if column in merged_data]].take(rows)
+    customers = customer_metrics(sliced)
+    try:
+        rfm_bins = fit_rfm_bins(customers)
+    except (ValueError, IndexError):
+        rfm_bins = dataset.rfm_bins
+    RFM = score_rfm(customers, rfm_bins)[['segment']]
+
+    sliced['segment'] = attach_segments(sliced, RFM)
+    return Dataset(merged_data, customer_review_frequency(sliced), build_cube(sliced), build_totals(sliced), RFM,
+                   rfm_bins, segment_crosstabs(sliced), rows)
+
+
+def view_frame(dataset, columns):
+    """Kolom merged_data untuk baris dataset: semua baris, atau hanya baris irisan filter."""
+    frame = dataset.merged_data[columns]
+    return frame if dataset.rows is None else frame.take(dataset.rows)
@@ -0,0 +1,121 @@
+"""Tabel dimensi dan surrogate key int32 untuk kolom id dan kategori ``merged_data``.
+
+Setiap kolom dimensi (id order/pelanggan/produk/penjual, kategori produk,
+metode pembayaran, negara bagian) dipetakan ke key integer padat 0..n-1.
+Tabel fakta cukup menyimpan key int32; string hanya disimpan sekali di tabel
+dimensi dan di-decode untuk baris yang benar-benar ditampilkan.
+
+Key bersifat stabil: nilai baru (mis. dari batch ingest) ditambahkan di akhir
+dimensi, sehingga key yang sudah tersimpan tidak berubah. Hasil decode berupa
+Categorical yang kode kategorinya sama dengan key, jadi groupby dan join di
+dashboard tetap berjalan di atas kode integer.
+"""
+import os
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+KEY_DTYPE = 'int32'
+
+# Terjemahan nama kategori produk (Portugis -> Inggris) dari dataset Olist
+TRANSLATION_FILE = 'product_category_name_translation.csv'
+
+
+class Dimension(NamedTuple):
+    column: str
+    labels: pd.Index
+
+    def encode(self, values):
+        """Surrogate key int32 per baris (-1 untuk NaN atau nilai di luar dimensi)."""
+        values = pd.Series(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Cukup memetakan kategori sekali, lalu kode per baris diterjemahkan lewat lookup
+            lookup = np.append(self.labels.get_indexer(values.cat.categories), -1)
+            return lookup[values.cat.codes.to_numpy()].astype(KEY_DTYPE)
+        return self.labels.get_indexer(values).astype(KEY_DTYPE)
+
+    def decode(self, keys):
+        """Categorical berlabel dari surrogate key; NaN atau -1 menjadi NaN."""
+        keys = pd.Series(keys).fillna(-1).to_numpy().astype(KEY_DTYPE)
+        return pd.Categorical.from_codes(keys, dtype=pd.CategoricalDtype(self.labels))
+
+    def extend(self, values):
+        """Dimensi dengan nilai baru ditambahkan di akhir; key yang sudah ada tidak berubah."""
+        values = pd.Series(values).dropna()
+        new = pd.Index(values.unique().astype(object)).difference(self.labels)
+        if not len(new):
+            return self
+        return Dimension(self.column, self.labels.append(new))
+
+    def table(self, start=0):
+        """Tabel dimensi: key dan label, mulai dari key ``start``."""
+        return pd.DataFrame({'key': np.arange(start, len(self.labels), dtype=KEY_DTYPE),
+                             self.column: self.labels[start:]})
+
+
+def dimension(column, values):
+    """Dimensi dari nilai unik (tanpa NaN), terurut leksikografis."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.remove_unused_categories().cat.categories
+    else:
+        values = values.dropna().unique()
+    return Dimension(column, pd.Index(np.asarray(values, dtype=object)).sort_values())
+
+
+def build_dimensions(frame, columns):
+    """Dimensi untuk setiap kolom dimensi yang ada di frame."""
+    return {column: dimension(column, frame[column]) for column in columns if column in frame}
+
+
+def extend_dimensions(dimensions, frame):
+    """Dimensi yang diperluas dengan nilai baru dari frame (mis. batch ingest)."""
+    return {column: dim.extend(frame[column]) if column in frame else dim for column, dim in dimensions.items()}
+
+
+def encode_frame(frame, dimensions):
+    """Salinan frame dengan kolom dimensi diganti surrogate key int32."""
+    frame = frame.copy()
+    for column, dim in dimensions.items():
+        if column in frame:
+            frame[column] = dim.encode(frame[column])
+    return frame
+
+
+def decode_frame(frame, dimensions, columns=None):
+    """Mengganti kolom key dengan Categorical berlabel (di tempat); columns membatasi kolom yang di-decode."""
+    for column in columns or list(dimensions):
+        if column in frame:
+            frame[column] = dimensions[column].decode(frame[column])
+    return frame
+
+
+def category_translation(data_dir=DATA_DIR):
+    """Nama kategori Portugis per nama bahasa Inggris, atau None jika file terjemahan tidak ada."""
+    path = os.path.join(data_dir, TRANSLATION_FILE)
+    if not os.path.exists(path):
+        return None
+    translation = pd.read_csv(path, dtype=str)
+    return translation.drop_duplicates('product_category_name_english').set_index(
+        'product_category_name_english')['product_category_name']
+
+
+def display_table(dim, data_dir=DATA_DIR, start=0):
+    """Tabel dimensi untuk tampilan (mulai dari key ``start``); kategori produk dilengkapi nama Portugisnya."""
+    table = dim.table(start)
+    if dim.column == 'product_category_name':
+        translation = category_translation(data_dir)
+        if translation is not None:
+            table['product_category_name_portuguese'] = translation.reindex(dim.labels[start:]).to_numpy()
+    return table
+
+
+def dimension_from_table(column, table):
+    """Dimensi dari tabel dimensi tersimpan (baris diurutkan menurut key)."""
+    table = table.sort_values('key')
+    if not np.array_equal(table['key'].to_numpy(), np.arange(len(table))):
+        raise ValueError(f"Key dimensi {column!r} tidak padat")
+    return Dimension(column, pd.Index(table[column].to_numpy(dtype=object)))
@@ -0,0 +1,109 @@
+"""Cache payload grafik (spesifikasi JSON Plotly) untuk semua varian pilihan widget.
+
+Ruang varian grafik dashboard kecil dan tetap (lihat ``charts.CHARTS``).
+Setelah halaman pertama tampil, sebuah thread latar membangun semua varian
+untuk view (versi dataset, filter) yang sedang dilihat dan menyimpan payload
+JSON-nya. Mengganti pilihan selectbox cukup mengambil payload dari cache lalu
+membungkusnya kembali sebagai Figure tanpa validasi ulang, karena payload
+tersebut dihasilkan oleh Plotly sendiri.
+
+Cache dipakai bersama oleh semua sesi, dengan eviction LRU dan batas total
+ukuran payload yang dapat diatur lewat environment variable
+``DASHBOARD_FIGURE_CACHE_MB``.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+# Batas total ukuran payload yang disimpan (MB)
+FIGURE_CACHE_MB = float(os.environ.get('DASHBOARD_FIGURE_CACHE_MB', 64))
+
+
+def payload_figure(payload):
+    """Figure dari payload JSON Plotly, tanpa validasi properti ulang."""
+    return go.Figure(json.loads(payload), _validate=False)
+
+
+class FigureCache:
+    """Payload JSON grafik per key dengan eviction LRU berdasarkan total ukuran."""
+
+    def __init__(self, max_bytes=int(FIGURE_CACHE_MB * 2**20)):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._warming = set()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """Payload untuk key (ditandai baru dipakai), atau None."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key, payload):
+        """Menyimpan payload; entri yang paling lama tidak dipakai dibuang sampai muat."""
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key))
+            self._entries[key] = payload
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def figure(self, key, build):
+        """Figure untuk key; jika belum ada, ``build()`` dipanggil dan payload-nya disimpan."""
+        payload = self.get(key)
+        if payload is None:
+            payload = build().to_json()
+            self.put(key, payload)
+        return payload_figure(payload)
+
+    def warm(self, prefix, variants, build):
+        """Membangun payload semua varian yang belum ada di thread latar.
+
+        Key setiap varian adalah ``(prefix, nama) + args``; ``build(nama, *args)``
+        dipanggil dari thread latar, jadi tidak boleh memakai API Streamlit.
+        Mengembalikan thread-nya, atau None jika prefix yang sama sedang diproses.
+        """
+        with self._lock:
+            if prefix in self._warming:
+                return None
+            self._warming.add(prefix)
+
+        def run():
+            try:
+                for name, args in variants:
+                    key = (prefix, name) + tuple(args)
+                    if key not in self:
+                        self.put(key, build(name, *args).to_json())
+            finally:
+                with self._lock:
+                    self._warming.discard(prefix)
+
+        thread = threading.Thread(target=run, name='figure-cache-warm', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        """Jumlah entri, ukuran total (MB), hit, dan miss."""
+        with self._lock:
+            return {'entries': len(self._entries), 'mb': round(self.size / 2**20, 2),
+                    'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,108 @@
+"""Indeks untuk filter global dashboard (tanggal, negara bagian, kategori, pembayaran).
+
+Indeks dibangun sekali per versi dataset:
+
+- posisi baris yang diurutkan menurut ``order_purchase_timestamp``, sehingga
+  rentang tanggal dijawab dengan dua ``np.searchsorted`` dan satu slice,
+- untuk setiap kolom filter, daftar id baris per nilai (row-id list), sehingga
+  pilihan beberapa nilai cukup menggabungkan beberapa daftar.
+
+Hasil tiap filter ditandai pada bitmap boolean lalu di-AND-kan; tidak ada
+masking per baris pada frame penuh untuk setiap interaksi.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from rfm import NAT, NS_PER_DAY, category_codes
+
+# Kolom kategori yang bisa difilter (hanya yang ada di merged_data yang dipakai)
+FILTER_COLUMNS = ['customer_state', 'seller_state', 'product_category_name', 'payment_type']
+
+
+class Filters(NamedTuple):
+    start: object = None
+    end: object = None
+    customer_state: tuple = ()
+    seller_state: tuple = ()
+    product_category_name: tuple = ()
+    payment_type: tuple = ()
+
+    def active(self):
+        """True jika minimal satu filter membatasi baris."""
+        return any(value for value in self)
+
+
+class RowIdIndex(NamedTuple):
+    labels: np.ndarray
+    row_ids: np.ndarray
+    boundaries: np.ndarray
+
+    def rows(self, values):
+        """Id baris untuk semua nilai yang dipilih (tidak berurutan)."""
+        positions = np.flatnonzero(np.isin(self.labels, np.asarray(values, dtype=object)))
+        return np.concatenate([self.row_ids[self.boundaries[i]:self.boundaries[i + 1]] for i in positions]
+                              or [np.empty(0, dtype=self.row_ids.dtype)])
+
+
+def row_id_index(values):
+    """Id baris dikelompokkan per nilai; baris bernilai NaN tidak diindeks."""
+    codes, uniques = category_codes(values)
+    row_ids = np.argsort(codes, kind='stable')
+    boundaries = np.searchsorted(codes[row_ids], np.arange(len(uniques) + 1))
+    return RowIdIndex(np.asarray(uniques, dtype=object), row_ids.astype('int64'), boundaries)
+
+
+class FilterIndex(NamedTuple):
+    n_rows: int
+    time_order: np.ndarray
+    sorted_timestamps: np.ndarray
+    columns: dict
+
+    def date_bounds(self):
+        """Tanggal pembelian pertama dan terakhir (tanpa NaT)."""
+        valid = self.sorted_timestamps[self.sorted_timestamps != NAT]
+        return pd.Timestamp(valid[0]).date(), pd.Timestamp(valid[-1]).date()
+
+    def options(self, column):
+        """Nilai yang tersedia untuk kolom filter, terurut."""
+        index = self.columns[column]
+        present = np.diff(index.boundaries) > 0
+        return sorted(index.labels[present].tolist())
+
+    def rows(self, filters):
+        """Posisi baris (terurut) yang lolos semua filter."""
+        mask = None
+        if filters.start is not None or filters.end is not None:
+            # NaT tersimpan sebagai int64 minimum sehingga selalu berada di awal urutan
+            lo = np.searchsorted(self.sorted_timestamps, NAT, side='right')
+            hi = self.n_rows
+            if filters.start is not None:
+                lo = max(lo, np.searchsorted(self.sorted_timestamps, pd.Timestamp(filters.start).value, side='left'))
+            if filters.end is not None:
+                # Tanggal akhir inklusif: batas atas adalah awal hari berikutnya
+                end = pd.Timestamp(filters.end).normalize().value + NS_PER_DAY
+                hi = np.searchsorted(self.sorted_timestamps, end, side='left')
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[self.time_order[lo:hi]] = True
+
+        for column in FILTER_COLUMNS:
+            values = getattr(filters, column)
+            if not values or column not in self.columns:
+                continue
+            selected = np.zeros(self.n_rows, dtype=bool)
+            selected[self.columns[column].rows(values)] = True
+            mask = selected if mask is None else mask & selected
+
+        if mask is None:
+            return np.arange(self.n_rows)
+        return np.flatnonzero(mask)
+
+
+def build_filter_index(merged_data):
+    """Indeks tanggal terurut dan row-id per nilai untuk setiap kolom filter."""
+    timestamps = merged_data['order_purchase_timestamp'].to_numpy('datetime64[ns]').view('int64')
+    time_order = np.argsort(timestamps, kind='stable')
+    columns = {column: row_id_index(merged_data[column]) for column in FILTER_COLUMNS if column in merged_data}
+    return FilterIndex(len(merged_data), time_order, timestamps[time_order], columns)
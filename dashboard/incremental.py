@@ -0,0 +1,189 @@
+"""Ingest inkremental batch order baru tanpa menghitung ulang seluruh riwayat.
+
+State yang diperbarui per batch:
+
+- cube agregat dan totals (lihat ``aggregates.py``),
+- id order per bulan, untuk menghitung order distinct hanya pada bulan yang tersentuh,
+- state RFM per pelanggan (pembelian terakhir, jumlah order, total nilai).
+
+Part batch ditulis lebih dulu, lalu cache turunan. Metadata setiap cache
+menyimpan jumlah part batch yang sudah tergabung, sehingga jika proses berhenti
+di tengah ingest, cache yang tertinggal dibangun ulang dari seluruh data pada
+pemuatan berikutnya.
+
+Skor RFM pelanggan yang tidak tersentuh batch tidak berubah, karena batas
+kuantil dan tanggal referensi dibekukan saat state dibangun. Hanya pelanggan
+di dalam batch yang diberi skor ulang; ``rescore_all`` menghitung ulang batas
+kuantil dari state pelanggan (tanpa membaca baris order).
+
+Sketch per bulan (lihat ``sketches.py``) ikut diperbarui jika cache-nya sudah
+ada atau mode perkiraan (``DASHBOARD_APPROXIMATE=1``) aktif. Totals di cache
+cube selalu eksak; perkiraan order unik dihitung dari sketch saat dibaca.
+
+Pemakaian: ``python incremental.py order_baru.csv [merged_data.csv]``
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from aggregates import CUBE_KEYS, CUBE_SUFFIX, build_cube, load_aggregates
+from data_store import SCHEMA, append_rows, apply_schema, cache_paths, data_meta, encode_rows, is_current, \
+    load_merged_data, read_meta, write_parquet
+from rfm import customer_metrics, fit_rfm_bins, score_rfm
+from sketches import APPROXIMATE, load_partition_sketches, save_partition_sketches, sketch_cache_exists, update_partitions
+
+# Akhiran file cache untuk state pelanggan dan folder id order per bulan
+CUSTOMER_SUFFIX = '.customers'
+ORDERS_SUFFIX = '.orders'
+
+def _orders_dir(csv_path, cache_dir):
+    return os.path.splitext(cache_paths(csv_path, ORDERS_SUFFIX, cache_dir)[0])[0]
+
+
+def _order_ids(frame):
+    # Key order_id; baris tanpa order_id (key -1) tidak dihitung sebagai order
+    order_ids = frame['order_id']
+    return order_ids[order_ids >= 0]
+
+
+def _order_months(batch):
+    return batch['order_purchase_timestamp'].dt.strftime('%Y-%m').fillna('unknown')
+
+
+def _write_order_ids(order_ids, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame({'order_id': order_ids}).to_parquet(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+
+
+def build_state(csv_path='merged_data.csv', cache_dir=None, merged_data=None):
+    """Membangun state pelanggan dan id order per bulan dari seluruh data (sekali saja).
+
+    ``merged_data`` yang sudah dimuat pemanggil dipakai langsung jika diberikan.
+    """
+    if merged_data is None:
+        merged_data = load_merged_data(csv_path, cache_dir)
+
+    orders_dir = _orders_dir(csv_path, cache_dir)
+    for path in glob.glob(os.path.join(orders_dir, '*.parquet')):
+        os.remove(path)
+    for month, ids in _order_ids(merged_data).groupby(_order_months(merged_data), observed=True):
+        _write_order_ids(ids.unique(), os.path.join(orders_dir, f'{month}.parquet'))
+
+    customers = customer_metrics(merged_data)
+    rfm_bins = fit_rfm_bins(customers)
+    customers = score_rfm(customers, rfm_bins)
+    parquet_path, meta_path = cache_paths(csv_path, CUSTOMER_SUFFIX, cache_dir)
+    write_parquet(customers.reset_index(), parquet_path, meta_path, {**data_meta(csv_path, cache_dir), **rfm_bins})
+    return customers, rfm_bins
+
+
+def load_customer_state(csv_path='merged_data.csv', cache_dir=None, merged_data=None):
+    """Memuat state RFM per pelanggan, membangunnya jika belum ada atau data berubah.
+
+    ``merged_data`` (opsional) adalah data yang sudah dimuat pemanggil, dipakai saat membangun.
+    """
+    parquet_path, meta_path = cache_paths(csv_path, CUSTOMER_SUFFIX, cache_dir)
+    meta = read_meta(meta_path)
+    if not is_current(meta, csv_path, cache_dir) or not os.path.exists(parquet_path):
+        return build_state(csv_path, cache_dir, merged_data=merged_data)
+    rfm_bins = {key: meta[key] for key in ('reference_date', 'recency_bins', 'monetary_bins')}
+    return pd.read_parquet(parquet_path).set_index('customer_unique_id'), rfm_bins
+
+
+def _new_order_ids(batch, csv_path, cache_dir):
+    # Hanya file id order untuk bulan yang ada di batch yang dibaca; hasilnya
+    # (path -> id order lama + baru) ditulis setelah part batch tersimpan
+    orders_dir = _orders_dir(csv_path, cache_dir)
+    updates = {}
+    for month, ids in _order_ids(batch).groupby(_order_months(batch), observed=True):
+        path = os.path.join(orders_dir, f'{month}.parquet')
+        known = pd.read_parquet(path)['order_id'] if os.path.exists(path) else pd.Series([], dtype='int32')
+        fresh = pd.Index(ids.unique()).difference(known)
+        if len(fresh):
+            updates[path] = (known.to_numpy(), fresh.to_numpy())
+    return updates
+
+
+def _merge_cube(cube, batch):
+    combined = pd.concat([cube, build_cube(batch)], ignore_index=True)
+    combined['product_category_name'] = combined['product_category_name'].astype(str).where(
+        combined['product_category_name'].notna())
+    merged = combined.groupby(CUBE_KEYS, dropna=False).sum().reset_index()
+    merged['product_category_name'] = merged['product_category_name'].astype('category')
+    return merged
+
+
+def _merge_customers(customers, rfm_bins, batch):
+    delta = customer_metrics(batch)
+    touched = customers.reindex(delta.index)
+    updated = pd.DataFrame({
+        'last_purchase': pd.concat([touched['last_purchase'], delta['last_purchase']], axis=1).max(axis=1),
+        'Frequency': touched['Frequency'].fillna(0).astype('int64') + delta['Frequency'],
+        'Monetary': touched['Monetary'].fillna(0) + delta['Monetary'],
+    })
+    rescored = score_rfm(updated, rfm_bins)
+
+    # Baris pelanggan yang tersentuh diganti dengan hasil skor ulang
+    customers = pd.concat([customers[~customers.index.isin(rescored.index)], rescored])
+    return customers, len(rescored)
+
+
+def ingest(batch, csv_path='merged_data.csv', cache_dir=None, approximate=None):
+    """Menerapkan batch order baru ke cube, totals, state pelanggan, sketch, dan data baris."""
+    approximate = APPROXIMATE if approximate is None else approximate
+    batch = apply_schema(batch[[column for column in SCHEMA if column in batch.columns]].copy())
+    # Id baru mendapat key di akhir dimensi; semua state di bawah memakai key yang sama dengan data dasar
+    batch = encode_rows(batch, csv_path, cache_dir)
+
+    cube, totals = load_aggregates(csv_path, cache_dir)
+    customers, rfm_bins = load_customer_state(csv_path, cache_dir)
+
+    sketch_table = None
+    if approximate or sketch_cache_exists(csv_path, cache_dir):
+        # Hanya partisi bulan yang ada di batch yang digabung dengan sketch batch
+        sketch_table = update_partitions(load_partition_sketches(csv_path, cache_dir), batch)
+
+    totals = dict(totals)
+    order_updates = _new_order_ids(batch, csv_path, cache_dir)
+    totals['total_orders'] += sum(len(fresh) for _, fresh in order_updates.values())
+    totals['total_revenue'] += float(batch['price'].sum())
+    totals['row_count'] += len(batch)
+    cube = _merge_cube(cube, batch)
+    customers, rescored = _merge_customers(customers, rfm_bins, batch)
+
+    # Part batch ditulis lebih dulu; cache turunan mencatat jumlah part yang sudah tergabung.
+    # State pelanggan ditulis terakhir: jika belum ter-update, build_state juga membangun
+    # ulang file id order per bulan.
+    append_rows(batch, csv_path, cache_dir)
+    for path, (known, fresh) in order_updates.items():
+        _write_order_ids(np.concatenate([known, fresh]), path)
+    if sketch_table is not None:
+        save_partition_sketches(sketch_table, csv_path, cache_dir)
+    meta = data_meta(csv_path, cache_dir)
+    parquet_path, meta_path = cache_paths(csv_path, CUBE_SUFFIX, cache_dir)
+    write_parquet(cube, parquet_path, meta_path, {**meta, 'totals': totals})
+    parquet_path, meta_path = cache_paths(csv_path, CUSTOMER_SUFFIX, cache_dir)
+    write_parquet(customers.reset_index(), parquet_path, meta_path, {**meta, **rfm_bins})
+    return {'rows': len(batch), 'rescored_customers': rescored, 'totals': totals}
+
+
+def rescore_all(csv_path='merged_data.csv', cache_dir=None):
+    """Menghitung ulang tanggal referensi dan batas kuantil lalu memberi skor ulang semua pelanggan."""
+    customers, _ = load_customer_state(csv_path, cache_dir)
+    rfm_bins = fit_rfm_bins(customers)
+    customers = score_rfm(customers, rfm_bins)
+    parquet_path, meta_path = cache_paths(csv_path, CUSTOMER_SUFFIX, cache_dir)
+    write_parquet(customers.reset_index(), parquet_path, meta_path, {**data_meta(csv_path, cache_dir), **rfm_bins})
+    return customers, rfm_bins
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('Pemakaian: python incremental.py order_baru.csv [merged_data.csv]')
+    source = sys.argv[2] if len(sys.argv) > 2 else 'merged_data.csv'
+    result = ingest(pd.read_csv(sys.argv[1]), source)
+    print(f"{result['rows']} baris ditambahkan, {result['rescored_customers']} pelanggan diberi skor ulang")
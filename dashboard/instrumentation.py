@@ -0,0 +1,105 @@
+"""Pencatatan waktu, jumlah baris, dan memori per bagian dashboard (opsional).
+
+Mode instrumentasi aktif jika environment variable ``DASHBOARD_PROFILE=1``
+atau URL dashboard memakai query parameter ``?profile=1``. Setiap bagian
+dibungkus ``section``; hasilnya dikumpulkan sebagai daftar record dan, jika
+``DASHBOARD_PROFILE_LOG`` diisi, ditambahkan ke file JSON lines.
+
+Contoh::
+
+    records = []
+    with section(records, 'rfm_scoring') as record:
+        RFM, rfm_bins = compute_rfm(merged_data)
+        record['rows'] = len(RFM)
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Environment variable untuk mengaktifkan mode instrumentasi dan lokasi file log JSON lines
+PROFILE_ENV = 'DASHBOARD_PROFILE'
+PROFILE_LOG_ENV = 'DASHBOARD_PROFILE_LOG'
+
+# Query parameter untuk mengaktifkan mode instrumentasi dari URL
+PROFILE_QUERY_PARAM = 'profile'
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# tracemalloc bersifat global per proses, sedangkan sesi Streamlit berjalan sebagai
+# thread. Hanya satu bagian pada satu waktu yang boleh mengukur memori.
+_memory_lock = threading.Lock()
+
+
+def profiling_enabled(query_params=None):
+    """True jika instrumentasi diaktifkan lewat environment variable atau query parameter."""
+    if os.environ.get(PROFILE_ENV, '').lower() in TRUE_VALUES:
+        return True
+    return str((query_params or {}).get(PROFILE_QUERY_PARAM, '')).lower() in TRUE_VALUES
+
+
+@contextmanager
+def section(records, name, enabled=True, memory=True, **context):
+    """Mengukur satu bagian; record yang di-yield boleh diisi ``rows`` oleh pemanggil.
+
+    Puncak memori adalah alokasi tertinggi selama bagian berjalan, relatif
+    terhadap alokasi saat bagian dimulai. tracemalloc mencatat alokasi semua
+    thread, jadi hanya satu bagian yang mengukur memori pada satu waktu; bagian
+    lain yang berjalan bersamaan (sesi lain atau bagian bersarang) mencatat
+    ``peak_mb`` None. Jika ``enabled`` False, tidak ada yang diukur dan record
+    tidak dicatat.
+    """
+    record = {'section': name, 'rows': None, **context}
+    if not enabled:
+        yield record
+        return
+
+    measuring = memory and _memory_lock.acquire(blocking=False)
+    started_tracing = False
+    if measuring:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = round(time.perf_counter() - start, 4)
+        record['peak_mb'] = None
+        if measuring:
+            record['peak_mb'] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 2)
+            if started_tracing:
+                tracemalloc.stop()
+            _memory_lock.release()
+        record['timestamp'] = pd.Timestamp.now().isoformat(timespec='milliseconds')
+        records.append(record)
+        log_path = os.environ.get(PROFILE_LOG_ENV)
+        if log_path:
+            write_jsonl([record], log_path)
+
+
+def to_jsonl(records):
+    """Record sebagai teks JSON lines (satu objek JSON per baris)."""
+    return ''.join(json.dumps(record, default=str) + '\n' for record in records)
+
+
+def write_jsonl(records, path):
+    """Menambahkan record ke file JSON lines."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(to_jsonl(records))
+
+
+def summary_table(records):
+    """Tabel ringkas record untuk ditampilkan di panel instrumentasi."""
+    columns = ['section', 'seconds', 'rows', 'peak_mb', 'timestamp']
+    table = pd.DataFrame(records)
+    return table.reindex(columns=columns + [column for column in table.columns if column not in columns])
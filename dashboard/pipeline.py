@@ -0,0 +1,274 @@
+"""Pipeline pembangun ``merged_data`` dari tabel mentah Olist dengan memori terbatas.
+
+Langkah penggabungan dan pembersihan sama dengan notebook, tetapi tidak ada
+tabel besar yang dimuat utuh. Tabel dibaca per potongan (``chunksize``) dengan
+tipe data eksplisit, lalu dipecah ke partisi berdasarkan hash kunci:
+
+1. ``orders`` dan ``customers`` dipecah menurut hash ``customer_id``;
+   ``order_items``, ``order_payments``, dan ``order_reviews`` menurut hash
+   ``order_id``. Potongan partisi ditulis sebagai file Parquet sementara.
+2. Per partisi pelanggan, orders digabung dengan customers, order yang belum
+   terkirim dibuang, lalu hasilnya dipecah ulang menurut hash ``order_id``.
+3. Per partisi order, tabel fakta digabung dengan tabel dimensi kecil
+   (products + terjemahan kategori, sellers), dibersihkan seperti di
+   notebook, dan ditulis sebagai part Parquet bertipe (``SCHEMA``).
+4. Part-part digabung menjadi satu file Parquet (dan, jika diminta, CSV
+   ``merged_data.csv`` beserta cache Parquet-nya untuk dashboard).
+
+Semua baris satu order berada di partisi yang sama, sehingga ``dropna`` dan
+``drop_duplicates`` per partisi sama hasilnya dengan pada frame penuh. Memori
+puncak kira-kira sebanding dengan satu potongan atau satu partisi per proses,
+dan langkah 1-3 dijalankan paralel di beberapa proses.
+
+Pemakaian: ``python pipeline.py ../data merged_data.parquet --csv merged_data.csv --partitions 16 --jobs 4``
+"""
+import argparse
+import functools
+import glob
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_store import DATETIME_COLUMNS, SCHEMA, apply_schema, write_cache_from_parts
+from instrumentation import section
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+# Tabel mentah Olist: nama -> (file, kolom yang dibaca beserta tipe datanya)
+RAW_TABLES = {
+    'orders': ('olist_orders_dataset.csv', {
+        'order_id': str, 'customer_id': str,
+        'order_purchase_timestamp': str, 'order_delivered_customer_date': str,
+    }),
+    'customers': ('olist_customers_dataset.csv', {
+        'customer_id': str, 'customer_unique_id': str, 'customer_state': str,
+    }),
+    'order_items': ('olist_order_items_dataset.csv', {
+        'order_id': str, 'product_id': str, 'seller_id': str, 'price': 'float64', 'freight_value': 'float64',
+    }),
+    'order_payments': ('olist_order_payments_dataset.csv', {
+        'order_id': str, 'payment_type': str, 'payment_value': 'float64',
+    }),
+    'order_reviews': ('olist_order_reviews_dataset.csv', {
+        'order_id': str, 'review_score': 'float64',
+    }),
+    'products': ('olist_products_dataset.csv', {
+        'product_id': str, 'product_category_name': str,
+    }),
+    'sellers': ('olist_sellers_dataset.csv', {
+        'seller_id': str, 'seller_state': str,
+    }),
+    'translation': ('product_category_name_translation.csv', {
+        'product_category_name': str, 'product_category_name_english': str,
+    }),
+}
+
+# Tabel besar yang dipecah ke partisi beserta kunci partisinya
+SPLIT_KEYS = {
+    'orders': 'customer_id',
+    'customers': 'customer_id',
+    'order_items': 'order_id',
+    'order_payments': 'order_id',
+    'order_reviews': 'order_id',
+}
+
+# Kunci duplikat seperti di notebook
+DUPLICATE_SUBSET = ['order_id', 'product_id', 'seller_id', 'payment_value']
+
+CHUNK_ROWS = 200_000
+PARTITIONS = 16
+
+
+def _raw_path(data_dir, table):
+    return os.path.join(data_dir, RAW_TABLES[table][0])
+
+
+def read_table(data_dir, table, chunksize=None):
+    """Membaca tabel mentah dengan kolom dan tipe data eksplisit (iterator jika chunksize diisi)."""
+    dtypes = RAW_TABLES[table][1]
+    return pd.read_csv(_raw_path(data_dir, table), usecols=list(dtypes), dtype=dtypes, chunksize=chunksize)
+
+
+def _empty(table):
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in RAW_TABLES[table][1].items()})
+
+
+def partition_of(values, partitions):
+    """Nomor partisi per baris dari hash nilai kunci."""
+    return pd.util.hash_array(np.asarray(values, dtype=object)) % np.uint64(partitions)
+
+
+def _spill(frame, key, partitions, directory, name):
+    # Setiap partisi yang berisi baris mendapat satu file di foldernya sendiri
+    if frame.empty:
+        return
+    buckets = partition_of(frame[key], partitions)
+    for k in np.unique(buckets):
+        path = os.path.join(directory, f'p{int(k):05d}', f'{name}.parquet')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frame[buckets == k].to_parquet(path, index=False)
+
+
+def _read_spilled(directory, k, table):
+    # Potongan dibaca sesuai urutan penulisan agar urutan baris tetap seperti sumber
+    paths = sorted(glob.glob(os.path.join(directory, f'p{k:05d}', '*.parquet')))
+    if not paths:
+        return _empty(table)
+    return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+
+def split_table(data_dir, table, work_dir, partitions, chunksize=CHUNK_ROWS):
+    """Langkah 1: memecah satu tabel mentah ke partisi per potongan; mengembalikan jumlah baris."""
+    rows = 0
+    directory = os.path.join(work_dir, table)
+    for i, chunk in enumerate(read_table(data_dir, table, chunksize)):
+        _spill(chunk, SPLIT_KEYS[table], partitions, directory, f'c{i:06d}')
+        rows += len(chunk)
+    return rows
+
+
+def attach_customers(work_dir, k, partitions):
+    """Langkah 2: orders + customers untuk satu partisi pelanggan, dipecah ulang menurut order_id."""
+    orders = _read_spilled(os.path.join(work_dir, 'orders'), k, 'orders')
+    customers = _read_spilled(os.path.join(work_dir, 'customers'), k, 'customers')
+    orders = orders.merge(customers, on='customer_id', how='left')
+    for column in DATETIME_COLUMNS:
+        orders[column] = pd.to_datetime(orders[column], format='ISO8601')
+    # Sama dengan dropna order_delivered_customer_date di notebook, tetapi sebelum join yang melipatgandakan baris
+    orders = orders.dropna(subset=['order_delivered_customer_date'])
+    _spill(orders, 'order_id', partitions, os.path.join(work_dir, 'orders_customers'), f'c{k:06d}')
+    return len(orders)
+
+
+@functools.lru_cache(maxsize=None)
+def load_dimensions(data_dir):
+    """Tabel dimensi kecil: products dengan kategori bahasa Inggris, dan sellers."""
+    products = read_table(data_dir, 'products')
+    translation = read_table(data_dir, 'translation')
+    products = products.merge(translation, on='product_category_name', how='left')
+    products['product_category_name'] = products['product_category_name_english']
+    products = products.drop(columns='product_category_name_english')
+    return products, read_table(data_dir, 'sellers')
+
+
+def build_partition(data_dir, work_dir, k):
+    """Langkah 3: join dan pembersihan seperti notebook untuk satu partisi order."""
+    products, sellers = load_dimensions(data_dir)
+    orders = _read_spilled(os.path.join(work_dir, 'orders_customers'), k, 'orders')
+    if orders.empty:
+        return None, 0
+
+    merged_data = orders.merge(_read_spilled(os.path.join(work_dir, 'order_items'), k, 'order_items'),
+                               on='order_id', how='left')
+    merged_data = merged_data.merge(products, on='product_id', how='left')
+    merged_data = merged_data.merge(sellers, on='seller_id', how='left')
+    merged_data = merged_data.merge(_read_spilled(os.path.join(work_dir, 'order_payments'), k, 'order_payments'),
+                                    on='order_id', how='left')
+    merged_data = merged_data.merge(_read_spilled(os.path.join(work_dir, 'order_reviews'), k, 'order_reviews'),
+                                    on='order_id', how='left')
+
+    merged_data = merged_data.dropna(subset=['product_id', 'seller_id', 'price', 'freight_value'])
+    merged_data = merged_data.dropna(subset=['payment_value'])
+    merged_data['product_category_name'] = merged_data['product_category_name'].fillna('unknown')
+    merged_data['review_score'] = merged_data['review_score'].fillna(3)
+    merged_data = merged_data.drop_duplicates(subset=DUPLICATE_SUBSET, keep='first')
+
+    merged_data = apply_schema(merged_data[[column for column in SCHEMA if column in merged_data]])
+    path = os.path.join(work_dir, 'parts', f'part-{k:05d}.parquet')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    merged_data.to_parquet(path, index=False)
+    return path, len(merged_data)
+
+
+def _run(function, arguments, jobs):
+    # Tanpa proses tambahan jika hanya satu job
+    if jobs <= 1:
+        return [function(*args) for args in arguments]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(function, *zip(*arguments)))
+
+
+def _unified_schema(schema):
+    # Lebar kode kategori (int8/int16) bisa berbeda antar part, jadi diseragamkan ke int32
+    fields = [pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+              if pa.types.is_dictionary(field.type) else field for field in schema]
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def write_output(part_paths, output, csv_path=None):
+    """Langkah 4: menggabungkan part menjadi satu Parquet (satu row group per part) dan CSV opsional."""
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    writer = None
+    try:
+        for i, path in enumerate(part_paths):
+            table = pq.read_table(path)
+            if writer is None:
+                schema = _unified_schema(table.schema)
+                writer = pq.ParquetWriter(output + '.tmp', schema)
+            writer.write_table(table.cast(schema))
+            if csv_path:
+                table.to_pandas().to_csv(csv_path + '.tmp', mode='w' if i == 0 else 'a', header=(i == 0),
+                                         index=False, date_format='%Y-%m-%d %H:%M:%S')
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(output + '.tmp', output)
+
+    if csv_path:
+        os.replace(csv_path + '.tmp', csv_path)
+        # Part yang sama dipasang sebagai cache CSV agar dashboard tidak mem-parsing ulang
+        write_cache_from_parts(part_paths, csv_path)
+
+
+def build(data_dir=DATA_DIR, output='merged_data.parquet', csv_path=None, partitions=PARTITIONS, jobs=None,
+          chunksize=CHUNK_ROWS, work_dir=None):
+    """Membangun merged_data dari tabel mentah; mengembalikan catatan waktu per langkah."""
+    jobs = jobs or os.cpu_count() or 1
+    # Folder output (dan folder kerja) dibuat lebih dulu agar folder sementara bisa dibuat di dalamnya
+    work_dir = work_dir or os.path.dirname(os.path.abspath(output))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    os.makedirs(work_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix='.pipeline-', dir=work_dir)
+    stages = []
+    try:
+        with section(stages, 'split', memory=False) as record:
+            counts = _run(split_table, [(data_dir, table, work_dir, partitions, chunksize) for table in SPLIT_KEYS],
+                          jobs)
+            record['rows'] = dict(zip(SPLIT_KEYS, counts))
+        with section(stages, 'attach_customers', memory=False) as record:
+            record['rows'] = sum(_run(attach_customers, [(work_dir, k, partitions) for k in range(partitions)], jobs))
+        with section(stages, 'build_partitions', memory=False) as record:
+            parts = _run(build_partition, [(data_dir, work_dir, k) for k in range(partitions)], jobs)
+            record['rows'] = sum(rows for _, rows in parts)
+        with section(stages, 'write_output', memory=False) as record:
+            part_paths = [path for path, _ in parts if path]
+            if not part_paths:
+                raise ValueError(f"Tidak ada order terkirim di tabel mentah pada {data_dir}")
+            write_output(part_paths, output, csv_path)
+            record['rows'] = stages[-1]['rows']
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return stages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Membangun merged_data dari tabel mentah Olist')
+    parser.add_argument('data_dir', nargs='?', default=DATA_DIR, help='folder CSV mentah Olist')
+    parser.add_argument('output', nargs='?', default='merged_data.parquet', help='file Parquet hasil')
+    parser.add_argument('--csv', default=None, help='juga menulis CSV merged_data (beserta cache Parquet-nya)')
+    parser.add_argument('--partitions', type=int, default=PARTITIONS, help='jumlah partisi order_id')
+    parser.add_argument('--jobs', type=int, default=None, help='jumlah proses paralel (default: jumlah core)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help='baris per potongan saat membaca CSV')
+    parser.add_argument('--work-dir', default=None, help='folder untuk file partisi sementara')
+    args = parser.parse_args()
+
+    stages = build(args.data_dir, args.output, args.csv, args.partitions, args.jobs, args.chunksize, args.work_dir)
+    for stage in stages:
+        print(f"  {stage['section']:<18} {stage['seconds']:8.3f} s  {stage['rows']}")
+    print(f"{stages[-1]['rows']} baris ditulis ke {args.output}" + (f" dan {args.csv}" if args.csv else ''))
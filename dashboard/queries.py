@@ -0,0 +1,260 @@
+"""Lapisan query agregasi dengan backend pandas dan DuckDB.
+
+Setiap query ditulis sekali sebagai ``Query``: kolom kunci (group by) dan
+ukuran (agregasi) yang dipilih dari daftar ekspresi yang sudah didefinisikan
+untuk kedua backend. Backend pandas menjalankannya sebagai groupby di atas
+frame di memori; backend DuckDB menerjemahkannya ke SQL di atas file Parquet
+di disk (multi-thread), sehingga hanya tabel hasil yang dimuat ke memori.
+Kolom id dan kategori di Parquet berupa surrogate key int32, jadi DuckDB
+mengelompokkan kode integer dan label kategori hanya di-decode untuk baris
+hasil. Seperti di ``load_merged_data``, kolom id tetap berupa key (-1 berarti
+NaN) pada kedua backend.
+Hasil kedua backend dinormalisasi ke urutan baris dan tipe data yang sama.
+
+DuckDB bersifat opsional (``pip install duckdb``). Backend default untuk
+dashboard dapat diatur lewat environment variable ``DASHBOARD_QUERY_BACKEND``.
+
+Pemakaian: ``python queries.py merged_data.csv`` (membandingkan kedua backend)
+"""
+import os
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from data_store import KEY_COLUMNS, LABEL_COLUMNS, load_dimensions, load_merged_data, parquet_files
+from rfm import QUANTILES, fit_rfm_bins, score_rfm
+
+# Backend default, dapat diganti dengan environment variable
+DEFAULT_BACKEND = os.environ.get('DASHBOARD_QUERY_BACKEND', 'pandas')
+
+
+def _purchase(df):
+    return df['order_purchase_timestamp']
+
+
+# Kolom turunan: nama -> (fungsi pandas, ekspresi SQL). Kolom dasar merged_data
+# dipakai langsung dengan namanya.
+DERIVED_COLUMNS = {
+    'order_month': (lambda df: pd.Series(_purchase(df).to_numpy('datetime64[ns]').astype('datetime64[M]')
+                                         .astype('datetime64[ns]'), index=df.index),
+                    "date_trunc('month', order_purchase_timestamp)"),
+    'weekday': (lambda df: _purchase(df).dt.dayofweek,
+                "isodow(order_purchase_timestamp) - 1"),
+    'order_hour': (lambda df: _purchase(df).dt.hour,
+                   "hour(order_purchase_timestamp)"),
+    # Hari penuh (dibulatkan ke bawah) seperti Timedelta.days
+    'delivery_time': (lambda df: (df['order_delivered_customer_date'] - _purchase(df)).dt.days,
+                      "floor((epoch_us(order_delivered_customer_date) - epoch_us(order_purchase_timestamp))"
+                      " / 86400000000.0)"),
+}
+
+# Agregasi: nama -> (nama fungsi pandas, template SQL)
+AGGREGATIONS = {
+    'size': ('size', 'count(*)'),
+    'count': ('count', 'count({column})'),
+    'sum': ('sum', 'coalesce(sum({column}), 0)'),
+    'max': ('max', 'max({column})'),
+    'nunique': ('nunique', 'count(DISTINCT {column})'),
+}
+
+
+class Query(NamedTuple):
+    keys: tuple
+    measures: dict
+
+
+# Cube tab "Dashboard Utama" (lihat aggregates.py)
+CUBE_QUERY = Query(
+    keys=('order_month', 'weekday', 'order_hour', 'product_category_name'),
+    measures={
+        'order_count': ('size', 'price'),
+        'price_sum': ('sum', 'price'),
+        'price_count': ('count', 'price'),
+        'freight_sum': ('sum', 'freight_value'),
+        'freight_count': ('count', 'freight_value'),
+        'delivery_sum': ('sum', 'delivery_time'),
+        'delivery_count': ('count', 'delivery_time'),
+    },
+)
+
+# Metrik ringkasan yang tidak bisa dijumlahkan dari cube
+TOTALS_QUERY = Query(
+    keys=(),
+    measures={
+        'total_orders': ('nunique', 'order_id'),
+        'total_revenue': ('sum', 'price'),
+        'row_count': ('size', 'price'),
+    },
+)
+
+# Metrik RFM per pelanggan (lihat rfm.customer_metrics)
+CUSTOMER_QUERY = Query(
+    keys=('customer_unique_id',),
+    measures={
+        'last_purchase': ('max', 'order_purchase_timestamp'),
+        'Frequency': ('count', 'order_purchase_timestamp'),
+        'Monetary': ('sum', 'price'),
+    },
+)
+
+
+def normalize_result(result, query):
+    """Hasil query dengan urutan baris dan tipe data yang sama untuk semua backend."""
+    result = result[list(query.keys) + list(query.measures)].reset_index(drop=True)
+    for key in query.keys:
+        if pd.api.types.is_datetime64_any_dtype(result[key]):
+            result[key] = result[key].astype('datetime64[ns]')
+        elif pd.api.types.is_numeric_dtype(result[key]):
+            result[key] = result[key].astype('int64' if result[key].notna().all() else 'float64')
+        else:
+            # Kategori diurutkan leksikografis agar urutan baris tidak bergantung pada sumbernya
+            values = result[key].astype(object).where(result[key].notna())
+            result[key] = pd.Categorical(values, categories=sorted(values.dropna().unique()))
+    if query.keys:
+        result = result.sort_values(list(query.keys), na_position='last', kind='stable', ignore_index=True)
+    for name, (aggregation, _) in query.measures.items():
+        if aggregation in ('size', 'count', 'nunique'):
+            result[name] = result[name].astype('int64')
+        elif aggregation == 'sum':
+            result[name] = result[name].astype('float64')
+        elif pd.api.types.is_datetime64_any_dtype(result[name]):
+            result[name] = result[name].astype('datetime64[ns]')
+    return result
+
+
+class PandasBackend:
+    """Menjalankan query sebagai groupby pandas di atas merged_data di memori."""
+
+    name = 'pandas'
+
+    def __init__(self, merged_data):
+        self.merged_data = merged_data
+
+    def _column(self, column):
+        if column in DERIVED_COLUMNS:
+            return DERIVED_COLUMNS[column][0](self.merged_data)
+        values = self.merged_data[column]
+        if column in KEY_COLUMNS and pd.api.types.is_integer_dtype(values.dtype):
+            # Key -1 adalah NaN, sama seperti NULL di SQL
+            return values.where(values >= 0)
+        return values
+
+    def run(self, query):
+        columns = set(query.keys) | {column for _, column in query.measures.values()}
+        frame = pd.DataFrame({column: self._column(column) for column in columns})
+        aggregations = {name: (column, AGGREGATIONS[aggregation][0])
+                        for name, (aggregation, column) in query.measures.items()}
+        if query.keys:
+            result = frame.groupby(list(query.keys), observed=True, dropna=False).agg(**aggregations).reset_index()
+        else:
+            result = pd.DataFrame({name: [frame[column].agg(function)]
+                                   for name, (column, function) in aggregations.items()})
+        return normalize_result(result, query)
+
+
+class DuckDBBackend:
+    """Menerjemahkan query ke SQL DuckDB di atas file Parquet merged_data."""
+
+    name = 'duckdb'
+
+    def __init__(self, files, threads=None, dimensions=None):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("Backend DuckDB membutuhkan paket duckdb: pip install duckdb") from e
+        self.files = list(files)
+        self.dimensions = dimensions or {}
+        self.connection = duckdb.connect()
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+
+    def _expression(self, column):
+        if column in DERIVED_COLUMNS:
+            return DERIVED_COLUMNS[column][1]
+        return f"nullif({column}, -1)" if column in KEY_COLUMNS else column
+
+    def sql(self, query):
+        """Teks SQL untuk query."""
+        source = f"read_parquet({[str(path) for path in self.files]!r}, union_by_name = true)"
+        selects = [f"{self._expression(key)} AS {key}" for key in query.keys]
+        selects += [AGGREGATIONS[aggregation][1].format(column=self._expression(column)) + f" AS {name}"
+                    for name, (aggregation, column) in query.measures.items()]
+        sql = f"SELECT {', '.join(selects)} FROM {source}"
+        if query.keys:
+            sql += f" GROUP BY {', '.join(str(i + 1) for i in range(len(query.keys)))}"
+        return sql
+
+    def run(self, query):
+        result = self.connection.sql(self.sql(query)).df()
+        for key in query.keys:
+            if key in self.dimensions:
+                result[key] = self.dimensions[key].decode(result[key])
+        return normalize_result(result, query)
+
+
+def get_backend(name=None, csv_path='merged_data.csv', cache_dir=None, merged_data=None):
+    """Backend query untuk dataset; backend pandas memakai merged_data jika sudah dimuat."""
+    name = name or DEFAULT_BACKEND
+    if name == 'pandas':
+        if merged_data is None:
+            merged_data = load_merged_data(csv_path, cache_dir)
+        return PandasBackend(merged_data)
+    if name == 'duckdb':
+        return DuckDBBackend(parquet_files(csv_path, cache_dir),
+                             dimensions=load_dimensions(csv_path, cache_dir, LABEL_COLUMNS))
+    raise ValueError(f"Backend query tidak dikenal: {name!r} (pilihan: 'pandas', 'duckdb')")
+
+
+def order_totals(backend):
+    """Totals dalam bentuk dict seperti aggregates.build_totals."""
+    row = backend.run(TOTALS_QUERY).iloc[0]
+    return {
+        'total_orders': int(row['total_orders']),
+        'total_revenue': float(row['total_revenue']),
+        'row_count': int(row['row_count']),
+    }
+
+
+def customer_metrics(backend):
+    """Pembelian terakhir, Frequency, dan Monetary per pelanggan (indeks key customer_unique_id)."""
+    customers = backend.run(CUSTOMER_QUERY)
+    customers = customers[(customers['Frequency'] > 0) & customers['customer_unique_id'].notna()]
+    customers['customer_unique_id'] = customers['customer_unique_id'].astype('int64')
+    return customers.set_index('customer_unique_id')
+
+
+def compute_rfm(backend, reference_date=None, q=QUANTILES):
+    """Tabel RFM dan konfigurasi bin, dengan metrik pelanggan dihitung oleh backend."""
+    customers = customer_metrics(backend)
+    rfm_bins = fit_rfm_bins(customers, reference_date, q)
+    return score_rfm(customers, rfm_bins), rfm_bins
+
+
+def compare(left, right, query, rtol=1e-9):
+    """True jika hasil query kedua backend sama (toleransi relatif untuk jumlah float)."""
+    a, b = left.run(query), right.run(query)
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for column in a.columns:
+        x, y = a[column], b[column]
+        if pd.api.types.is_float_dtype(x):
+            if not np.allclose(x.to_numpy(), y.to_numpy(), rtol=rtol, equal_nan=True):
+                return False
+        elif not x.astype(object).equals(y.astype(object)):
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else 'merged_data.csv'
+    backends = [get_backend('pandas', source), get_backend('duckdb', source)]
+    for label, query in (('cube', CUBE_QUERY), ('totals', TOTALS_QUERY), ('pelanggan', CUSTOMER_QUERY)):
+        timings = []
+        for backend in backends:
+            start = time.perf_counter()
+            rows = len(backend.run(query))
+            timings.append(f"{backend.name} {time.perf_counter() - start:.3f} s")
+        print(f"{label:<10} {rows:>9} baris  {'  '.join(timings)}  sama: {compare(*backends, query)}")
@@ -0,0 +1,201 @@
+"""Laporan statis: semua grafik dashboard dan semua variannya dirender ke HTML/PNG.
+
+Grafik dibangun dengan fungsi yang sama seperti dashboard (``charts.py``) di
+atas dataset lengkap (tanpa filter). Setiap varian pilihan widget (mis.
+Terlaris/Kurang Laku, Tertinggi/Terendah, Tercepat/Terlama, setiap segmen RFM
+x jenis produk) menjadi satu file. Grafik dibangun paralel di process pool;
+setiap proses memuat dataset sekali.
+
+File output dicatat di ``manifest.json`` bersama kunci cache-nya: versi
+dataset, nama grafik, pilihan widget, format, dan sidik jari kode grafik
+(semua modul lokal yang dipakai, versi Plotly, dan pengaturan environment yang
+mengubah grafik).
+Pada run berikutnya, file yang kuncinya tidak berubah dilewati.
+
+Ekspor PNG membutuhkan paket ``kaleido`` (opsional).
+
+Pemakaian: ``python report.py merged_data.csv --output report --formats html png --jobs 4``
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly
+
+import review_plots
+import sketches
+from charts import CHARTS, build_figure, chart_variants
+from data_store import dataset_version, read_meta, write_meta
+from dataset import load_dataset
+
+FORMATS = ('html', 'png')
+MANIFEST_NAME = 'manifest.json'
+
+# Ukuran gambar PNG (piksel)
+IMAGE_WIDTH = 1000
+IMAGE_HEIGHT = 600
+
+
+def _local_module_files():
+    # Semua modul dari folder ini yang sudah diimpor (charts, dataset, dan dependensinya)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    files = {os.path.abspath(module.__file__) for module in list(sys.modules.values())
+             if getattr(module, '__file__', None)}
+    return sorted(path for path in files if os.path.dirname(path) == directory and path.endswith('.py'))
+
+
+def _code_fingerprint():
+    # Perubahan kode modul mana pun, versi Plotly, atau pengaturan yang mengubah grafik
+    # membuat semua file dirender ulang
+    digest = hashlib.sha256()
+    for path in _local_module_files():
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode() + f.read())
+    settings = {
+        'plotly': plotly.__version__,
+        'raw_points_threshold': review_plots.RAW_POINTS_THRESHOLD,
+        'approximate': sketches.APPROXIMATE,
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def chart_filename(name, args, fmt):
+    """Nama file untuk satu varian grafik, mis. ``category_sold__kurang-laku.html``."""
+    slug = '__'.join(re.sub(r'[^a-z0-9]+', '-', str(arg).lower()).strip('-') for arg in args)
+    return f"{name}__{slug}.{fmt}" if slug else f"{name}.{fmt}"
+
+
+def chart_key(version, name, args, fmt, code=None):
+    """Kunci cache satu file: versi dataset + spesifikasi grafik."""
+    spec = {
+        'data': version,
+        'chart': name,
+        'args': list(args),
+        'format': fmt,
+        'code': code or _code_fingerprint(),
+        'size': [IMAGE_WIDTH, IMAGE_HEIGHT] if fmt == 'png' else None,
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+_dataset = None
+_dataset_version = None
+
+
+def _init_worker(csv_path):
+    # Dataset dimuat sekali per proses, bukan per grafik. Proses pool hasil fork
+    # sudah mewarisi dataset dari proses utama, jadi tidak dimuat ulang.
+    global _dataset, _dataset_version
+    version = (os.path.abspath(csv_path), dataset_version(csv_path))
+    if _dataset is None or _dataset_version != version:
+        _dataset = load_dataset(csv_path)
+        _dataset_version = version
+
+
+def render_chart(name, args, outputs):
+    """Membangun satu grafik lalu menulisnya ke setiap (format, path)."""
+    fig = build_figure(_dataset, name, *args)
+    for fmt, path in outputs:
+        if fmt == 'html':
+            # plotly.min.js ditulis sekali di folder laporan, tidak disisipkan di setiap file
+            fig.write_html(path + '.tmp', include_plotlyjs='directory', full_html=True)
+        else:
+            fig.write_image(path + '.tmp', format=fmt, width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+        os.replace(path + '.tmp', path)
+    return name, args
+
+
+def _check_formats(formats):
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Format tidak dikenal: {sorted(unknown)} (pilihan: {', '.join(FORMATS)})")
+    if 'png' in formats:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Ekspor PNG membutuhkan paket kaleido: pip install kaleido") from e
+
+
+def write_index(output_dir, manifest, formats):
+    """Halaman index.html berisi tautan (dan gambar PNG) semua grafik."""
+    lines = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>Laporan Dashboard</title></head><body>',
+             '<h1>Laporan Dashboard Analisis Data Penjualan E-Commerce</h1>']
+    for name, spec in CHARTS.items():
+        lines.append(f'<h2>{html.escape(name)}</h2><ul>')
+        for args in spec.variants():
+            label = html.escape(' / '.join(args) or name)
+            files = [chart_filename(name, args, fmt) for fmt in formats]
+            links = ' '.join(f'<a href="{file}">{file.rsplit(".", 1)[1]}</a>' for file in files if file in manifest)
+            lines.append(f'<li>{label} {links}</li>')
+            if 'png' in formats and chart_filename(name, args, 'png') in manifest:
+                lines.append(f'<img src="{chart_filename(name, args, "png")}" width="{IMAGE_WIDTH // 2}">')
+        lines.append('</ul>')
+    lines.append('</body></html>')
+    with open(os.path.join(output_dir, 'index.html'), 'w') as f:
+        f.write('\n'.join(lines))
+
+
+def render_report(csv_path='merged_data.csv', output_dir='report', formats=('html',), jobs=None, names=None,
+                  force=False):
+    """Merender semua varian grafik yang berubah; mengembalikan jumlah grafik yang dirender dan dilewati."""
+    _check_formats(formats)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = read_meta(manifest_path) or {}
+    version = dataset_version(csv_path)
+    code = _code_fingerprint()
+
+    tasks, keys, skipped = [], {}, 0
+    for name, args in chart_variants(names):
+        outputs = []
+        for fmt in formats:
+            filename = chart_filename(name, args, fmt)
+            keys[filename] = chart_key(version, name, args, fmt, code)
+            path = os.path.join(output_dir, filename)
+            if force or manifest.get(filename) != keys[filename] or not os.path.exists(path):
+                outputs.append((fmt, path))
+        if outputs:
+            tasks.append((name, args, outputs))
+        else:
+            skipped += 1
+
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if tasks:
+        # Dimuat sekali di proses utama lebih dulu agar cache Parquet/agregat/RFM dibangun
+        # satu kali, bukan bersamaan oleh setiap proses pool
+        _init_worker(csv_path)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(csv_path,)) as executor:
+            list(executor.map(render_chart, *zip(*tasks)))
+    else:
+        for task in tasks:
+            render_chart(*task)
+
+    # Manifest hanya diperbarui untuk file yang benar-benar ada
+    for filename, key in keys.items():
+        if os.path.exists(os.path.join(output_dir, filename)):
+            manifest[filename] = key
+    write_meta(manifest_path, manifest)
+    write_index(output_dir, manifest, formats)
+    return {'rendered': len(tasks), 'skipped': skipped}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merender semua grafik dashboard ke file HTML/PNG')
+    parser.add_argument('source', nargs='?', default='merged_data.csv', help='CSV merged_data')
+    parser.add_argument('--output', default='report', help='folder laporan')
+    parser.add_argument('--formats', nargs='+', default=['html'], choices=FORMATS)
+    parser.add_argument('--jobs', type=int, default=None, help='jumlah proses paralel (default: jumlah core)')
+    parser.add_argument('--charts', nargs='+', default=None, choices=list(CHARTS), help='hanya grafik tertentu')
+    parser.add_argument('--force', action='store_true', help='render ulang walaupun cache masih berlaku')
+    args = parser.parse_args()
+
+    result = render_report(args.source, args.output, args.formats, args.jobs, args.charts, args.force)
+    print(f"{result['rendered']} grafik dirender, {result['skipped']} dilewati (tidak berubah); "
+          f"lihat {os.path.join(args.output, 'index.html')}")
@@ -0,0 +1,102 @@
+"""Grafik "Faktor Mempengaruhi Skor Ulasan" yang diagregasi di server.
+
+Scatter dan box plot Plotly mengirim setiap baris ke browser. Di atas batas
+jumlah baris tertentu, scatter diganti dengan grid densitas 2D (histogram)
+dan box plot dibangun dari ringkasan kuartil/whisker yang sudah dihitung,
+sehingga ukuran payload tidak bergantung pada jumlah baris.
+
+Batas baris default dapat diatur lewat environment variable
+``DASHBOARD_RAW_POINTS_THRESHOLD``.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Jumlah baris maksimum yang masih digambar sebagai titik mentah
+RAW_POINTS_THRESHOLD = int(os.environ.get('DASHBOARD_RAW_POINTS_THRESHOLD', 20_000))
+
+# Jumlah bin sumbu x untuk grid densitas
+DENSITY_BINS = 60
+
+# Jumlah nilai unik maksimum agar sumbu y dianggap diskrit (mis. skor ulasan 1-5)
+MAX_DISCRETE_VALUES = 20
+
+DEFAULT_COLOR = '#636efa'
+
+
+def _edges(values, bins):
+    unique = np.unique(values)
+    if len(unique) <= MAX_DISCRETE_VALUES:
+        # Satu bin per nilai diskrit, berpusat di nilai tersebut
+        midpoints = (unique[1:] + unique[:-1]) / 2
+        return np.concatenate([[unique[0] - 0.5], midpoints, [unique[-1] + 0.5]]), unique
+    edges = np.linspace(unique[0], unique[-1], bins + 1)
+    return edges, (edges[1:] + edges[:-1]) / 2
+
+
+def density_grid(df, x, y, bins=DENSITY_BINS):
+    """Jumlah baris per sel grid (y, x) beserta titik tengah bin masing-masing sumbu."""
+    data = df[[x, y]].dropna()
+    x_values = data[x].to_numpy('float64')
+    y_values = data[y].to_numpy('float64')
+    x_edges, x_centers = _edges(x_values, bins)
+    y_edges, y_centers = _edges(y_values, bins)
+    counts, _, _ = np.histogram2d(y_values, x_values, bins=[y_edges, x_edges])
+    return counts, x_centers, y_centers
+
+
+def review_scatter(df, x, y, title, labels, color=DEFAULT_COLOR, threshold=None):
+    """Scatter mentah untuk data kecil, grid densitas 2D untuk data besar."""
+    threshold = RAW_POINTS_THRESHOLD if threshold is None else threshold
+    if len(df) <= threshold:
+        return px.scatter(df, x=x, y=y, title=title, labels=labels, opacity=0.5, color_discrete_sequence=[color])
+
+    counts, x_centers, y_centers = density_grid(df, x, y)
+    fig = go.Figure(go.Heatmap(
+        z=np.where(counts > 0, counts, np.nan), x=x_centers, y=y_centers,
+        colorscale=[[0, '#f2f2f2'], [1, color]], colorbar={'title': 'Jumlah'},
+        hovertemplate=f"{labels.get(x, x)}: %{{x}}<br>{labels.get(y, y)}: %{{y}}<br>Jumlah: %{{z}}<extra></extra>",
+    ))
+    fig.update_layout(title=title, xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+    return fig
+
+
+def box_summary(df, x, y):
+    """Kuartil, median, rata-rata, dan whisker (1.5 IQR) nilai y per grup x."""
+    rows = []
+    for group, values in df[[x, y]].dropna().groupby(x, observed=True)[y]:
+        values = values.to_numpy('float64')
+        q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        # Whisker berhenti di titik data terjauh yang masih di dalam 1.5 IQR
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        rows.append({x: group, 'q1': q1, 'median': median, 'q3': q3, 'mean': values.mean(),
+                     'lowerfence': inside.min(), 'upperfence': inside.max(), 'count': len(values)})
+    return pd.DataFrame(rows, columns=[x, 'q1', 'median', 'q3', 'mean', 'lowerfence', 'upperfence', 'count'])
+
+
+def review_box(df, x, y, title, labels, color_discrete_sequence=(DEFAULT_COLOR,), color_by_group=False,
+               threshold=None):
+    """Box plot mentah untuk data kecil, box dari ringkasan kuartil untuk data besar."""
+    threshold = RAW_POINTS_THRESHOLD if threshold is None else threshold
+    if len(df) <= threshold:
+        return px.box(df, x=x, y=y, color=x if color_by_group else None, title=title, labels=labels,
+                      color_discrete_sequence=list(color_discrete_sequence))
+    return summary_box(box_summary(df, x, y), x, y, title, labels, color_discrete_sequence, color_by_group)
+
+
+def summary_box(summary, x, y, title, labels, color_discrete_sequence=(DEFAULT_COLOR,), color_by_group=False):
+    """Box plot dari tabel ringkasan (kolom seperti ``box_summary``), mis. hasil sketch."""
+    fig = go.Figure()
+    for i, row in enumerate(summary.itertuples(index=False)):
+        color = color_discrete_sequence[i % len(color_discrete_sequence) if color_by_group else 0]
+        fig.add_trace(go.Box(
+            x=[row[0]], q1=[row.q1], median=[row.median], q3=[row.q3], mean=[row.mean],
+            lowerfence=[row.lowerfence], upperfence=[row.upperfence],
+            name=str(row[0]), marker_color=color, showlegend=color_by_group,
+        ))
+    fig.update_layout(title=title, xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+    return fig
@@ -0,0 +1,251 @@
+"""Mesin skor RFM (Recency, Frequency, Monetary) yang tervektorisasi.
+
+Pelanggan diubah menjadi kode integer, lalu metrik per pelanggan dihitung
+dengan ``np.bincount`` / ``np.maximum.at`` dan skor dengan ``np.searchsorted``
+serta tabel lookup segmen, tanpa loop Python per pelanggan. Untuk basis
+pelanggan yang sangat besar, baris dapat diproses per chunk dan dibagi ke
+beberapa proses (``n_jobs``).
+
+Contoh::
+
+    RFM, rfm_bins = compute_rfm(merged_data)
+    RFM, rfm_bins = compute_rfm(merged_data, reference_date='2018-09-01', n_jobs=4)
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# Jumlah kuantil untuk skor Recency dan Monetary (skor 1..Q)
+QUANTILES = 3
+
+# Segmentasi berdasarkan gabungan skor R, F, M (sama dengan notebook)
+SEGMENTS = ['Gold', 'Silver', 'Bronze']
+GOLD_SCORES = ['333', '332', '323', '322']
+SILVER_SCORES = ['221', '222', '223', '232', '231', '233']
+
+# Nilai NaT dalam representasi int64 (nanodetik), sekaligus identitas untuk max
+NAT = np.iinfo('int64').min
+NS_PER_DAY = 86_400 * 10**9
+
+
+def _segment_lookup():
+    # Tabel [R, F, M] -> kode segmen; default Bronze
+    lookup = np.full((10, 10, 10), SEGMENTS.index('Bronze'), dtype='int8')
+    for scores, segment in ((SILVER_SCORES, 'Silver'), (GOLD_SCORES, 'Gold')):
+        for score in scores:
+            lookup[int(score[0]), int(score[1]), int(score[2])] = SEGMENTS.index(segment)
+    return lookup
+
+
+SEGMENT_LOOKUP = _segment_lookup()
+
+
+def category_codes(values):
+    """Kode integer padat (-1 untuk NaN) beserta daftar nilai uniknya.
+
+    Kolom surrogate key int32 (lihat ``data_store.KEY_COLUMNS``) sudah berupa
+    kode: key dipakai langsung dan nilai uniknya adalah key itu sendiri.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    if pd.api.types.is_integer_dtype(values.dtype):
+        codes = values.to_numpy().astype('int64')
+        return codes, np.arange(codes.max() + 1 if len(codes) else 0)
+    codes, uniques = pd.factorize(values)
+    return codes, uniques
+
+
+def _aggregate_chunk(args):
+    codes, timestamps, prices, n_customers = args
+    valid = (timestamps != NAT) & (codes >= 0)
+    codes, timestamps, prices = codes[valid], timestamps[valid], prices[valid]
+
+    last_purchase = np.full(n_customers, NAT, dtype='int64')
+    np.maximum.at(last_purchase, codes, timestamps)
+    frequency = np.bincount(codes, minlength=n_customers)
+    monetary = np.bincount(codes, weights=np.nan_to_num(prices), minlength=n_customers)
+    return last_purchase, frequency, monetary
+
+
+def aggregate_customers(codes, timestamps, prices, n_customers, n_jobs=1, chunk_size=None):
+    """Pembelian terakhir (int64 ns), jumlah baris, dan total price per kode pelanggan.
+
+    Baris dibagi menjadi chunk berukuran ``chunk_size``; jika ``n_jobs > 1``
+    chunk diproses paralel di process pool lalu hasil parsialnya digabung.
+    """
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(codes) // n_jobs))
+    tasks = ((codes[start:start + chunk_size], timestamps[start:start + chunk_size],
+              prices[start:start + chunk_size], n_customers)
+             for start in range(0, len(codes), chunk_size))
+
+    last_purchase = np.full(n_customers, NAT, dtype='int64')
+    frequency = np.zeros(n_customers, dtype='int64')
+    monetary = np.zeros(n_customers, dtype='float64')
+
+    def combine(partials):
+        for chunk_last, chunk_frequency, chunk_monetary in partials:
+            np.maximum(last_purchase, chunk_last, out=last_purchase)
+            np.add(frequency, chunk_frequency, out=frequency)
+            np.add(monetary, chunk_monetary, out=monetary)
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            combine(pool.map(_aggregate_chunk, tasks))
+    else:
+        combine(map(_aggregate_chunk, tasks))
+    return last_purchase, frequency, monetary
+
+
+def customer_metrics(merged_data, n_jobs=1, chunk_size=None):
+    """Pembelian terakhir, Frequency, dan Monetary per customer_unique_id (key atau label)."""
+    codes, uniques = category_codes(merged_data['customer_unique_id'])
+    timestamps = merged_data['order_purchase_timestamp'].to_numpy('datetime64[ns]').view('int64')
+    prices = merged_data['price'].to_numpy('float64')
+
+    last_purchase, frequency, monetary = aggregate_customers(
+        codes, timestamps, prices, len(uniques), n_jobs, chunk_size)
+
+    # Pelanggan tanpa baris bertanggal tidak ikut dihitung
+    present = frequency > 0
+    index = pd.Index(np.asarray(uniques)[present], name='customer_unique_id')
+    return pd.DataFrame({
+        'last_purchase': last_purchase[present].view('datetime64[ns]'),
+        'Frequency': frequency[present],
+        'Monetary': monetary[present],
+    }, index=index)
+
+
+def quantile_bins(values, q=QUANTILES):
+    """Batas kuantil seperti ``pd.qcut``; error jika batas tidak unik."""
+    bins = np.quantile(np.asarray(values, dtype='float64'), np.linspace(0, 1, q + 1))
+    if len(np.unique(bins)) != len(bins):
+        raise ValueError(f"Bin edges must be unique: {bins.tolist()}")
+    return bins
+
+
+def fit_rfm_bins(customers, reference_date=None, q=QUANTILES):
+    """Tanggal referensi dan batas kuantil Recency/Monetary dari tabel pelanggan.
+
+    Default tanggal referensi adalah sehari setelah pembelian terakhir.
+    """
+    last_purchase = customers['last_purchase'].to_numpy('datetime64[ns]').view('int64')
+    if reference_date is None:
+        reference_date = pd.Timestamp(last_purchase.max()) + pd.to_timedelta(1, 'D')
+    reference_date = pd.Timestamp(reference_date)
+    recency = (reference_date.value - last_purchase) // NS_PER_DAY
+    return {
+        'reference_date': reference_date.isoformat(),
+        'recency_bins': quantile_bins(recency, q).tolist(),
+        'monetary_bins': quantile_bins(customers['Monetary'], q).tolist(),
+    }
+
+
+def score_values(values, bins):
+    """Skor 1..Q dengan bin tertutup di kanan; nilai di luar rentang masuk bin tepi."""
+    return (np.searchsorted(np.asarray(bins[1:-1]), values, side='left') + 1).astype('int8')
+
+
+def score_rfm(customers, rfm_bins):
+    """Menambahkan Recency, skor R/F/M, RFM_score, dan segmen ke tabel pelanggan."""
+    scored = customers[['last_purchase', 'Frequency', 'Monetary']].copy()
+    last_purchase = scored['last_purchase'].to_numpy('datetime64[ns]').view('int64')
+    recency = (pd.Timestamp(rfm_bins['reference_date']).value - last_purchase) // NS_PER_DAY
+
+    r_score = score_values(recency, rfm_bins['recency_bins'])
+    m_score = score_values(scored['Monetary'].to_numpy(), rfm_bins['monetary_bins'])
+    f_score = np.where(scored['Frequency'].to_numpy() == 1, 1, 2).astype('int8')
+
+    scored['Recency'] = recency
+    scored['R_score'] = r_score
+    scored['F_score'] = f_score
+    scored['M_score'] = m_score
+    scored['RFM_score'] = r_score.astype('int16') * 100 + f_score * 10 + m_score
+    scored['segment'] = pd.Categorical.from_codes(SEGMENT_LOOKUP[r_score, f_score, m_score], SEGMENTS)
+    return scored
+
+
+def compute_rfm(merged_data, reference_date=None, q=QUANTILES, n_jobs=1, chunk_size=None):
+    """Tabel RFM per pelanggan dan konfigurasi bin yang dipakai untuk skornya."""
+    customers = customer_metrics(merged_data, n_jobs, chunk_size)
+    rfm_bins = fit_rfm_bins(customers, reference_date, q)
+    return score_rfm(customers, rfm_bins), rfm_bins
+
+
+def attach_segments(merged_data, RFM):
+    """Segmen pelanggan per baris sebagai Categorical (kode int8) tanpa join ke tabel RFM."""
+    codes, uniques = category_codes(merged_data['customer_unique_id'])
+    segment_codes = RFM['segment'].astype(pd.CategoricalDtype(SEGMENTS)).cat.codes
+    # Lookup kode pelanggan -> kode segmen (-1 untuk pelanggan tanpa segmen)
+    if pd.api.types.is_integer_dtype(RFM.index.dtype) and pd.api.types.is_integer_dtype(np.asarray(uniques).dtype):
+        # Indeks RFM berupa key pelanggan, sama dengan kode baris: lookup cukup diisi per posisi
+        keys = RFM.index.to_numpy()
+        inside = (keys >= 0) & (keys < len(uniques))
+        lookup = np.full(len(uniques), -1, dtype='int8')
+        lookup[keys[inside]] = segment_codes.to_numpy()[inside]
+    else:
+        lookup = segment_codes.reindex(pd.Index(uniques)).fillna(-1).to_numpy('int8')
+    row_codes = np.where(codes >= 0, lookup[codes], -1)
+    return pd.Categorical.from_codes(row_codes, SEGMENTS)
+
+
+def month_codes(timestamps):
+    """Kode bulan (tahun * 12 + bulan - 1) per baris, -1 untuk NaT, tanpa accessor ``.dt``."""
+    ns = pd.Series(timestamps).to_numpy('datetime64[ns]')
+    months = ns.astype('datetime64[M]').astype('int64') + 1970 * 12
+    return np.where(ns.view('int64') != NAT, months, -1).astype('int32')
+
+
+def _month_labels(ordinals):
+    return [f"{ordinal // 12:04d}-{ordinal % 12 + 1:02d}" for ordinal in ordinals]
+
+
+def segment_crosstabs(merged_data):
+    """Jumlah baris segmen x bulan, segmen x kategori, dan segmen x metode pembayaran.
+
+    Semua kunci diubah menjadi kode integer dan digabung menjadi satu nomor sel
+    yang dihitung dengan ``np.bincount``; ketiga tabel silang diturunkan dari
+    array hitungan kecil tersebut. Kode bulan yang sudah dihitung saat dataset
+    dimuat (kolom ``purchase_month``) dipakai jika ada.
+    """
+    if 'purchase_month' in merged_data:
+        month = merged_data['purchase_month'].to_numpy()
+    else:
+        month = month_codes(merged_data['order_purchase_timestamp'])
+    category, categories = category_codes(merged_data['product_category_name'])
+    payment, payment_types = category_codes(merged_data['payment_type'])
+    segment = merged_data['segment'].cat.codes.to_numpy()
+
+    # Slot terakhir setiap kunci untuk NaT/NaN; baris tanpa segmen tidak dihitung
+    valid_month = month >= 0
+    first_month = int(month[valid_month].min()) if valid_month.any() else 0
+    n_months = (int(month[valid_month].max()) - first_month + 1 if valid_month.any() else 0) + 1
+    shape = (len(SEGMENTS), n_months, len(categories) + 1, len(payment_types) + 1)
+    rows = segment >= 0
+    cell = np.ravel_multi_index((
+        segment[rows],
+        np.where(valid_month, month - first_month, n_months - 1)[rows],
+        np.where(category >= 0, category, shape[2] - 1)[rows],
+        np.where(payment >= 0, payment, shape[3] - 1)[rows],
+    ), shape)
+    counts = np.bincount(cell, minlength=int(np.prod(shape))).reshape(shape)
+
+    def marginal(axis, labels):
+        # Jumlah segmen x satu kunci (tanpa slot NaN), hanya pasangan yang muncul
+        table = counts.sum(axis=tuple(i for i in (1, 2, 3) if i != axis))[:, :-1]
+        segment_codes, codes = np.nonzero(table)
+        return pd.Categorical.from_codes(segment_codes, SEGMENTS), labels(codes), table[segment_codes, codes]
+
+    segment, months, count = marginal(1, lambda codes: _month_labels(codes + first_month))
+    segment_monthly = pd.DataFrame({'bulan_pembelian': months, 'segment': segment, 'jumlah_order': count})
+    segment_monthly = segment_monthly.sort_values(['bulan_pembelian', 'segment'], ignore_index=True)
+
+    segment, names, count = marginal(2, lambda codes: np.asarray(categories)[codes])
+    segment_category = pd.DataFrame({'segment': segment, 'product_category_name': names, 'count': count})
+
+    segment, names, count = marginal(3, lambda codes: np.asarray(payment_types)[codes])
+    segment_payment = pd.DataFrame({'segment': segment, 'payment_type': names, 'count': count})
+
+    return {'month': segment_monthly, 'product_category_name': segment_category, 'payment_type': segment_payment}
@@ -0,0 +1,308 @@
+"""Sketch yang bisa digabung untuk distinct count dan kuantil (mode perkiraan).
+
+- ``HyperLogLog``: perkiraan jumlah nilai unik (order, pelanggan), galat ~0,8%.
+- ``TDigest``: perkiraan kuantil (statistik box plot durasi pengiriman).
+
+Keduanya dibangun dari array secara tervektorisasi dan bisa digabung tanpa
+membaca ulang baris. Sketch disimpan per partisi bulan pembelian; ringkasan
+untuk beberapa bulan dihitung dengan menggabungkan sketch bulan-bulan itu saja,
+dan ingest inkremental cukup memperbarui partisi bulan yang tersentuh batch.
+Filter tanggal yang selaras dengan batas bulan (lihat ``aligned_months``) dijawab
+dengan menggabungkan partisi bulan-bulan yang tercakup saja.
+
+Mode perkiraan diaktifkan dengan environment variable ``DASHBOARD_APPROXIMATE=1``.
+
+Pemakaian: ``python sketches.py merged_data.csv [YYYY-MM ...]``
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data_store import cache_paths, data_meta, is_current, load_merged_data, read_meta, write_parquet
+
+APPROXIMATE = os.environ.get('DASHBOARD_APPROXIMATE', '').lower() in ('1', 'true', 'yes', 'on')
+
+# Presisi HyperLogLog: 2**14 register (16 KB per sketch)
+HLL_PRECISION = 14
+
+# Kompresi t-digest: jumlah centroid paling banyak sekitar setengah nilai ini
+TDIGEST_COMPRESSION = 200
+
+# Akhiran file cache sketch per bulan
+SKETCH_SUFFIX = '.sketches'
+
+
+def row_hashes(values):
+    """Hash 64-bit per baris beserta mask baris yang tidak NaN; kategori cukup di-hash sekali."""
+    values = pd.Series(values)
+    if isinstance(values.dtype, pd.CategoricalDtype) and len(values.cat.categories) <= len(values):
+        codes = values.cat.codes.to_numpy()
+        hashes = pd.util.hash_array(np.asarray(values.cat.categories, dtype=object))
+        return hashes[np.maximum(codes, 0)], codes >= 0
+    if pd.api.types.is_integer_dtype(values.dtype):
+        # Surrogate key: -1 berarti NaN
+        values = values.to_numpy()
+        return pd.util.hash_array(values), values >= 0
+    valid = values.notna().to_numpy()
+    values = values.to_numpy()
+    if values.dtype.kind in 'OUS' or isinstance(values, pd.Categorical):
+        values = values.astype(object)
+    return pd.util.hash_array(values), valid
+
+
+class HyperLogLog:
+    """Perkiraan jumlah nilai unik; dua sketch digabung dengan max per register."""
+
+    def __init__(self, registers=None, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(2**precision, dtype='uint8') if registers is None else registers
+
+    @classmethod
+    def from_values(cls, values, precision=HLL_PRECISION):
+        hashes, valid = row_hashes(values)
+        return cls(precision=precision).add_hashes(hashes[valid])
+
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype='uint64')
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype('int64')
+        rest = hashes & np.uint64((1 << width) - 1)
+        # Posisi bit 1 pertama pada sisa hash (dihitung dari kiri), rest < 2**50 sehingga log2 eksak
+        rank = np.full(len(hashes), width + 1, dtype='uint8')
+        nonzero = rest > 0
+        rank[nonzero] = width - np.floor(np.log2(rest[nonzero].astype('float64'))).astype('uint8')
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        return HyperLogLog(np.maximum(self.registers, other.registers), self.precision)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype('int64')))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            # Koreksi rentang kecil (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        registers = np.frombuffer(payload, dtype='uint8').copy()
+        return cls(registers, int(np.log2(len(registers))))
+
+
+class TDigest:
+    """Perkiraan kuantil berbasis centroid (mean, bobot) dengan fungsi skala arcsin."""
+
+    def __init__(self, means=(), weights=(), minimum=np.nan, maximum=np.nan, compression=TDIGEST_COMPRESSION):
+        self.means = np.asarray(means, dtype='float64')
+        self.weights = np.asarray(weights, dtype='float64')
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.compression = compression
+
+    @classmethod
+    def from_values(cls, values, compression=TDIGEST_COMPRESSION):
+        values = np.asarray(values, dtype='float64')
+        values = np.sort(values[~np.isnan(values)])
+        if not len(values):
+            return cls(compression=compression)
+        return cls._compressed(values, np.ones(len(values)), values[0], values[-1], compression)
+
+    @classmethod
+    def _compressed(cls, means, weights, minimum, maximum, compression):
+        # Centroid yang jatuh di satuan skala k yang sama digabung; centroid di ekor tetap kecil
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        k = compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        bucket = np.floor(k - k[0]).astype('int64')
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        merged_means = np.add.reduceat(means * weights, starts) / merged_weights
+        return cls(merged_means, merged_weights, minimum, maximum, compression)
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def mean(self):
+        return float(np.sum(self.means * self.weights) / self.count) if self.count else np.nan
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        if not self.count:
+            return other
+        means = np.concatenate([self.means, other.means])
+        weights = np.concatenate([self.weights, other.weights])
+        order = np.argsort(means, kind='stable')
+        return TDigest._compressed(means[order], weights[order], min(self.minimum, other.minimum),
+                                   max(self.maximum, other.maximum), self.compression)
+
+    def quantile(self, q):
+        """Perkiraan kuantil q (skalar atau array) dengan interpolasi antar pusat centroid."""
+        if not self.count:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0], centers, [self.count]])
+        values = np.concatenate([[self.minimum], self.means, [self.maximum]])
+        return np.interp(np.asarray(q, dtype='float64') * self.count, positions, values)
+
+    def to_bytes(self):
+        header = [self.minimum, self.maximum, self.compression]
+        return np.concatenate([header, self.means, self.weights]).astype('float64').tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        array = np.frombuffer(payload, dtype='float64')
+        minimum, maximum, compression = array[:3]
+        means, weights = np.split(array[3:], 2)
+        return cls(means, weights, minimum, maximum, int(compression))
+
+
+SKETCH_TYPES = {'hll': HyperLogLog, 'tdigest': TDigest}
+
+
+def partition_sketches(merged_data):
+    """Sketch per bulan pembelian sebagai tabel (month, sketch, kind, payload)."""
+    timestamp = merged_data['order_purchase_timestamp']
+    months = pd.Series(timestamp.to_numpy('datetime64[ns]').astype('datetime64[M]').astype(str)) \
+        .replace('NaT', 'unknown')
+    delivery_time = (merged_data['order_delivered_customer_date'] - timestamp).dt.days.to_numpy('float64')
+    bad_review = (merged_data['review_score'] <= 2).to_numpy()
+
+    order_hashes, order_valid = row_hashes(merged_data['order_id'])
+    customer_hashes, customer_valid = row_hashes(merged_data['customer_unique_id'])
+
+    rows = []
+    for month, positions in months.groupby(months, sort=True).indices.items():
+        delivery = delivery_time[positions]
+        bad = bad_review[positions]
+        sketches = {
+            'orders': HyperLogLog().add_hashes(order_hashes[positions][order_valid[positions]]),
+            'customers': HyperLogLog().add_hashes(customer_hashes[positions][customer_valid[positions]]),
+            'delivery_time': TDigest.from_values(delivery),
+            'delivery_time_bad': TDigest.from_values(delivery[bad]),
+            'delivery_time_good': TDigest.from_values(delivery[~bad]),
+        }
+        for name, sketch in sketches.items():
+            kind = 'hll' if isinstance(sketch, HyperLogLog) else 'tdigest'
+            rows.append({'month': month, 'sketch': name, 'kind': kind, 'payload': sketch.to_bytes()})
+    return pd.DataFrame(rows, columns=['month', 'sketch', 'kind', 'payload'])
+
+
+def merge_partitions(table, months=None):
+    """Menggabungkan sketch semua bulan (atau hanya ``months``) menjadi satu sketch per nama."""
+    if months is not None:
+        table = table[table['month'].isin(list(months))]
+    merged = {}
+    for row in table.itertuples(index=False):
+        sketch = SKETCH_TYPES[row.kind].from_bytes(row.payload)
+        merged[row.sketch] = merged[row.sketch].merge(sketch) if row.sketch in merged else sketch
+    return merged
+
+
+def update_partitions(table, batch):
+    """Tabel sketch baru setelah batch digabung ke partisi bulan yang tersentuh."""
+    delta = partition_sketches(batch)
+    touched = table[table['month'].isin(delta['month'].unique())]
+    rows = []
+    for (month, name), group in pd.concat([touched, delta]).groupby(['month', 'sketch'], sort=False):
+        kind = group['kind'].iloc[0]
+        sketches = [SKETCH_TYPES[kind].from_bytes(payload) for payload in group['payload']]
+        merged = sketches[0]
+        for sketch in sketches[1:]:
+            merged = merged.merge(sketch)
+        rows.append({'month': month, 'sketch': name, 'kind': kind, 'payload': merged.to_bytes()})
+    untouched = table[~table['month'].isin(delta['month'].unique())]
+    return pd.concat([untouched, pd.DataFrame(rows, columns=table.columns)], ignore_index=True) \
+        .sort_values(['month', 'sketch'], ignore_index=True)
+
+
+def sketch_cache_exists(csv_path='merged_data.csv', cache_dir=None):
+    return os.path.exists(cache_paths(csv_path, SKETCH_SUFFIX, cache_dir)[0])
+
+
+def load_partition_sketches(csv_path='merged_data.csv', cache_dir=None):
+    """Memuat tabel sketch per bulan dari cache, membangunnya jika belum ada atau data berubah.
+
+    Cache berlaku selama CSV sumber sama dan semua part batch baru sudah tergabung.
+    """
+    parquet_path, meta_path = cache_paths(csv_path, SKETCH_SUFFIX, cache_dir)
+    meta = read_meta(meta_path)
+    if is_current(meta, csv_path, cache_dir) and os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path)
+
+    table = partition_sketches(load_merged_data(csv_path, cache_dir))
+    save_partition_sketches(table, csv_path, cache_dir)
+    return table
+
+
+def save_partition_sketches(table, csv_path='merged_data.csv', cache_dir=None):
+    """Menyimpan tabel sketch untuk data saat ini (CSV sumber dan part batch baru)."""
+    parquet_path, meta_path = cache_paths(csv_path, SKETCH_SUFFIX, cache_dir)
+    write_parquet(table, parquet_path, meta_path, data_meta(csv_path, cache_dir))
+
+
+def box_stats(digest):
+    """Statistik box plot (kuartil, rata-rata, whisker 1.5 IQR dibatasi min/max) dari t-digest."""
+    q1, median, q3 = digest.quantile([0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    return {
+        'q1': q1, 'median': median, 'q3': q3, 'mean': digest.mean(),
+        'lowerfence': max(digest.minimum, q1 - 1.5 * iqr),
+        'upperfence': min(digest.maximum, q3 + 1.5 * iqr),
+        'count': int(digest.count),
+    }
+
+
+def aligned_months(table, start=None, end=None):
+    """Label bulan di ``table`` yang tercakup rentang tanggal [start, end].
+
+    Mengembalikan None jika rentang tidak selaras dengan batas bulan (start bukan
+    tanggal 1 atau end bukan akhir bulan), karena partisi bulan tidak bisa dipotong.
+    Tanpa start/end rentang terbuka di sisi itu; bulan 'unknown' (NaT) tidak ikut.
+    """
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    if (start is not None and start.day != 1) or (end is not None and not end.is_month_end):
+        return None
+    months = table['month'].unique()
+    months = months[months != 'unknown']
+    if start is not None:
+        months = months[months >= start.strftime('%Y-%m')]
+    if end is not None:
+        months = months[months <= end.strftime('%Y-%m')]
+    return sorted(months.tolist())
+
+
+def summary(table, months=None):
+    """Perkiraan jumlah order dan pelanggan unik serta kuantil durasi pengiriman."""
+    merged = merge_partitions(table, months)
+    if not merged:
+        return {'distinct_orders': 0, 'distinct_customers': 0, 'delivery_time': None}
+    return {
+        'distinct_orders': merged['orders'].estimate(),
+        'distinct_customers': merged['customers'].estimate(),
+        'delivery_time': box_stats(merged['delivery_time']),
+        'delivery_time_bad': box_stats(merged['delivery_time_bad']),
+        'delivery_time_good': box_stats(merged['delivery_time_good']),
+    }
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else 'merged_data.csv'
+    months = sys.argv[2:] or None
+    result = summary(load_partition_sketches(source), months)
+    print(f"Order unik (perkiraan): {result['distinct_orders']}")
+    print(f"Pelanggan unik (perkiraan): {result['distinct_customers']}")
+    if result['delivery_time']:
+        stats = result['delivery_time']
+        print(f"Durasi pengiriman: median {stats['median']:.1f} hari, Q1 {stats['q1']:.1f}, Q3 {stats['q3']:.1f}")
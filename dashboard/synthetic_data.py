@@ -0,0 +1,167 @@
+"""Generator data sintetis berbentuk ``merged_data`` Olist untuk uji skala.
+
+Produk, kategori, dan penjual diambil dari file Olist di folder ``data/``;
+distribusi metode pembayaran, skor ulasan, waktu pengiriman, jam pembelian,
+negara bagian pelanggan, dan jumlah item per order meniru dataset Olist asli.
+Skala 1 menghasilkan sekitar 99 ribu order (~115 ribu baris), skala 10 dan
+100 berlipat sesuai.
+
+Pemakaian: ``python synthetic_data.py --scale 10 --output merged_data_10x.csv``
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_store import SCHEMA
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+# Jumlah order pada dataset Olist asli (skala 1)
+ORDERS_PER_SCALE = 99_441
+
+# Proporsi pelanggan yang melakukan pembelian ulang
+REPEAT_CUSTOMER_RATE = 0.03
+
+# Rentang tanggal pembelian dataset Olist
+START_DATE = pd.Timestamp('2016-09-04')
+END_DATE = pd.Timestamp('2018-08-31')
+
+# Distribusi metode pembayaran dan skor ulasan Olist
+PAYMENT_TYPES = ['credit_card', 'boleto', 'voucher', 'debit_card']
+PAYMENT_WEIGHTS = [0.739, 0.190, 0.056, 0.015]
+REVIEW_SCORES = [1, 2, 3, 4, 5]
+REVIEW_WEIGHTS = [0.115, 0.032, 0.082, 0.193, 0.578]
+# Pengiriman lambat (> 20 hari) jauh lebih sering mendapat ulasan buruk
+LATE_REVIEW_WEIGHTS = [0.45, 0.10, 0.12, 0.13, 0.20]
+LATE_DELIVERY_DAYS = 20
+
+# Distribusi negara bagian pelanggan Olist (sisanya dibagi rata ke negara bagian lain)
+CUSTOMER_STATES = {'SP': 0.420, 'RJ': 0.129, 'MG': 0.117, 'RS': 0.055, 'PR': 0.051, 'SC': 0.037, 'BA': 0.034,
+                   'DF': 0.022, 'ES': 0.020, 'GO': 0.020, 'PE': 0.017, 'CE': 0.013}
+OTHER_STATES = ['PA', 'MT', 'MA', 'MS', 'PB', 'PI', 'RN', 'AL', 'SE', 'TO', 'RO', 'AM', 'AC', 'AP', 'RR']
+
+# Bobot relatif jam pembelian (0-23), ramai di siang dan malam hari
+HOUR_WEIGHTS = [2.5, 1.2, 0.5, 0.3, 0.2, 0.2, 0.5, 1.2, 3.0, 4.8, 6.2, 6.6,
+                6.0, 6.5, 6.6, 6.4, 6.4, 6.0, 5.7, 5.9, 6.2, 6.3, 5.9, 4.3]
+
+CHUNK_ORDERS = 200_000
+
+
+def load_catalog(data_dir=DATA_DIR):
+    """Produk (dengan kategori bahasa Inggris) dan penjual (dengan negara bagian) dari file Olist."""
+    products = pd.read_csv(os.path.join(data_dir, 'olist_products_dataset.csv'),
+                           usecols=['product_id', 'product_category_name'])
+    translation = pd.read_csv(os.path.join(data_dir, 'product_category_name_translation.csv'),
+                              usecols=['product_category_name', 'product_category_name_english'])
+    products = products.merge(translation, on='product_category_name', how='left')
+    products['product_category_name'] = products['product_category_name_english'].fillna('unknown')
+    sellers = pd.read_csv(os.path.join(data_dir, 'olist_sellers_dataset.csv'), usecols=['seller_id', 'seller_state'])
+    return products[['product_id', 'product_category_name']], sellers
+
+
+def _hex_ids(rng, n):
+    return pd.Series(rng.integers(0, 2**64, size=(n, 2), dtype='uint64').tolist()).map(
+        lambda pair: f'{pair[0]:016x}{pair[1]:016x}').to_numpy()
+
+
+def _purchase_timestamps(rng, n):
+    # Volume order tumbuh mendekati linear sepanjang periode
+    days = (END_DATE - START_DATE).days
+    day_weights = np.linspace(0.2, 1.0, days)
+    day = rng.choice(days, size=n, p=day_weights / day_weights.sum())
+    hour_weights = np.asarray(HOUR_WEIGHTS) / np.sum(HOUR_WEIGHTS)
+    hour = rng.choice(24, size=n, p=hour_weights)
+    seconds = day * 86_400 + hour * 3_600 + rng.integers(0, 3_600, size=n)
+    return START_DATE + pd.to_timedelta(seconds, unit='s')
+
+
+def _customer_states(rng, n):
+    states = list(CUSTOMER_STATES) + OTHER_STATES
+    weights = list(CUSTOMER_STATES.values())
+    weights += [(1 - sum(weights)) / len(OTHER_STATES)] * len(OTHER_STATES)
+    return rng.choice(states, size=n, p=weights)
+
+
+def generate_chunk(rng, n_orders, products, sellers, customer_pool):
+    """Satu potong merged_data berisi n_orders order baru."""
+    order_ids = _hex_ids(rng, n_orders)
+    customer_ids = _hex_ids(rng, n_orders)
+    customer_states = _customer_states(rng, n_orders)
+
+    # Sebagian kecil order dibuat oleh pelanggan lama (dari potongan sebelumnya atau potongan ini)
+    customer_unique_ids = _hex_ids(rng, n_orders)
+    repeat = rng.random(n_orders) < REPEAT_CUSTOMER_RATE
+    existing = np.concatenate([customer_pool, customer_unique_ids[~repeat]])
+    customer_unique_ids[repeat] = rng.choice(existing, size=repeat.sum())
+
+    purchase = _purchase_timestamps(rng, n_orders)
+    delivery_days = rng.gamma(2.2, 5.5, size=n_orders)
+    delivered = purchase + pd.to_timedelta(np.round(delivery_days * 86_400), unit='s')
+    payment_type = rng.choice(PAYMENT_TYPES, size=n_orders, p=PAYMENT_WEIGHTS)
+    late = delivery_days > LATE_DELIVERY_DAYS
+    review_score = np.where(late, rng.choice(REVIEW_SCORES, size=n_orders, p=LATE_REVIEW_WEIGHTS),
+                            rng.choice(REVIEW_SCORES, size=n_orders, p=REVIEW_WEIGHTS)).astype('float64')
+
+    # Sebagian besar order berisi satu item; setiap item menjadi satu baris
+    items = rng.geometric(0.88, size=n_orders)
+    row_order = np.repeat(np.arange(n_orders), items)
+    n_rows = len(row_order)
+    product = rng.integers(0, len(products), size=n_rows)
+    seller = rng.integers(0, len(sellers), size=n_rows)
+    price = np.round(rng.lognormal(4.35, 0.85, size=n_rows), 2)
+    freight = np.round(5 + 0.12 * price * rng.lognormal(0, 0.35, size=n_rows), 2)
+    order_value = np.bincount(row_order, weights=price + freight, minlength=n_orders)
+
+    chunk = pd.DataFrame({
+        'order_id': order_ids[row_order],
+        'customer_id': customer_ids[row_order],
+        'order_purchase_timestamp': purchase[row_order],
+        'order_delivered_customer_date': delivered[row_order],
+        'customer_unique_id': customer_unique_ids[row_order],
+        'customer_state': customer_states[row_order],
+        'product_id': products['product_id'].to_numpy()[product],
+        'seller_id': sellers['seller_id'].to_numpy()[seller],
+        'seller_state': sellers['seller_state'].to_numpy()[seller],
+        'price': price,
+        'freight_value': freight,
+        'product_category_name': products['product_category_name'].to_numpy()[product],
+        'payment_type': payment_type[row_order],
+        'payment_value': np.round(order_value[row_order], 2),
+        'review_score': review_score[row_order],
+    })
+    return chunk[list(SCHEMA)], customer_unique_ids
+
+
+def generate(scale=1, seed=42, data_dir=DATA_DIR, chunk_orders=CHUNK_ORDERS):
+    """Menghasilkan potongan-potongan merged_data sintetis untuk skala tertentu."""
+    rng = np.random.default_rng(seed)
+    products, sellers = load_catalog(data_dir)
+    total_orders = int(round(ORDERS_PER_SCALE * scale))
+    customer_pool = np.empty(0, dtype=object)
+    for start in range(0, total_orders, chunk_orders):
+        chunk, customers = generate_chunk(rng, min(chunk_orders, total_orders - start), products, sellers,
+                                          customer_pool)
+        # Pool pelanggan lama dibatasi agar memori tetap kecil pada skala besar
+        customer_pool = np.concatenate([customer_pool, customers])[-1_000_000:]
+        yield chunk
+
+
+def write_csv(path, scale=1, seed=42, data_dir=DATA_DIR):
+    """Menulis merged_data sintetis ke CSV per potongan, mengembalikan jumlah baris."""
+    rows = 0
+    for i, chunk in enumerate(generate(scale, seed, data_dir)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                     date_format='%Y-%m-%d %H:%M:%S')
+        rows += len(chunk)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generator merged_data sintetis berbentuk Olist')
+    parser.add_argument('--scale', type=float, default=1, help='kelipatan ukuran dataset Olist (1, 10, 100, ...)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='merged_data.csv')
+    args = parser.parse_args()
+    print(f"{write_csv(args.output, args.scale, args.seed)} baris ditulis ke {args.output}")
@@ -0,0 +1,153 @@
+"""Tes galat dan penggabungan sketch HyperLogLog dan t-digest.
+
+Pemakaian: ``python -m pytest dashboard``
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import HyperLogLog, TDigest, aligned_months, partition_sketches, summary, update_partitions
+
+# Galat standar HyperLogLog 1.04 / sqrt(2**14) ~ 0,8%; batas tes ~4 sigma
+HLL_TOLERANCE = 0.03
+
+# Galat kuantil t-digest dalam satuan rank (0,5% dari jumlah nilai)
+RANK_TOLERANCE = 0.005
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def rank_error(values, estimates, q):
+    # Selisih rank kuantil hasil perkiraan terhadap rank yang diminta
+    values = np.sort(values)
+    ranks = np.searchsorted(values, estimates, side='left') / len(values)
+    return np.max(np.abs(ranks - np.asarray(q)))
+
+
+@pytest.mark.parametrize('n', [100, 5_000, 200_000])
+def test_hll_error_bound(n):
+    rng = np.random.default_rng(n)
+    values = pd.Series(rng.choice(np.arange(10 * n), size=n, replace=False)).astype(str)
+    # Setiap nilai muncul beberapa kali; duplikat tidak boleh menambah perkiraan
+    values = pd.concat([values, values.sample(frac=0.5, random_state=0)], ignore_index=True)
+    estimate = HyperLogLog.from_values(values).estimate()
+    assert abs(estimate - n) / n <= HLL_TOLERANCE
+
+
+def test_hll_ignores_missing():
+    values = pd.Series(['a', 'b', None, np.nan, 'a'])
+    assert HyperLogLog.from_values(values).estimate() == 2
+    assert HyperLogLog.from_values(pd.Series([0, 1, -1, 1], dtype='int32')).estimate() == 2
+
+
+def test_hll_merge_matches_single_pass():
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.integers(0, 300_000, size=400_000)).astype(str)
+    single = HyperLogLog.from_values(values)
+    merged = HyperLogLog()
+    for part in np.array_split(values.to_numpy(), 7):
+        merged = merged.merge(HyperLogLog.from_values(part))
+    # Max per register tidak bergantung pada urutan atau pembagian data: hasilnya identik
+    np.testing.assert_array_equal(merged.registers, single.registers)
+    restored = HyperLogLog.from_bytes(merged.to_bytes())
+    assert restored.estimate() == single.estimate()
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'exponential', 'integer_days'])
+def test_tdigest_quantile_error(distribution):
+    rng = np.random.default_rng(1)
+    values = {
+        'normal': rng.normal(10, 3, size=100_000),
+        'exponential': rng.exponential(5, size=100_000),
+        'integer_days': np.floor(rng.gamma(2, 6, size=100_000)),
+    }[distribution]
+    digest = TDigest.from_values(values)
+    estimates = digest.quantile(QUANTILES)
+    if distribution == 'integer_days':
+        # Banyak nilai kembar: perkiraan cukup berada di dalam nilai yang rank-nya benar
+        exact = np.quantile(values, QUANTILES)
+        assert np.all(np.abs(estimates - exact) <= 1)
+    else:
+        assert rank_error(values, estimates, QUANTILES) <= RANK_TOLERANCE
+    assert digest.count == len(values)
+    assert digest.mean() == pytest.approx(values.mean())
+    assert digest.quantile(0) == values.min() and digest.quantile(1) == values.max()
+    assert len(digest.means) <= digest.compression
+
+
+def test_tdigest_merge_matches_single_pass():
+    rng = np.random.default_rng(2)
+    values = rng.lognormal(2, 0.7, size=120_000)
+    single = TDigest.from_values(values)
+    merged = TDigest()
+    for part in np.array_split(rng.permutation(values), 12):
+        merged = merged.merge(TDigest.from_values(part))
+    assert merged.count == single.count
+    assert merged.minimum == single.minimum and merged.maximum == single.maximum
+    assert merged.mean() == pytest.approx(single.mean())
+    assert rank_error(values, merged.quantile(QUANTILES), QUANTILES) <= RANK_TOLERANCE
+    restored = TDigest.from_bytes(merged.to_bytes())
+    np.testing.assert_allclose(restored.quantile(QUANTILES), merged.quantile(QUANTILES))
+
+
+def test_tdigest_empty():
+    digest = TDigest.from_values([np.nan])
+    assert digest.count == 0 and np.isnan(digest.quantile(0.5))
+    assert digest.merge(TDigest.from_values([1.0, 2.0])).count == 2
+
+
+def orders_frame(n_orders=20_000, seed=3):
+    rng = np.random.default_rng(seed)
+    purchase = pd.Timestamp('2017-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24, size=n_orders), unit='h')
+    frame = pd.DataFrame({
+        'order_id': [f'o{i}' for i in range(n_orders)],
+        'customer_unique_id': [f'c{i}' for i in rng.integers(0, n_orders // 2, size=n_orders)],
+        'order_purchase_timestamp': purchase,
+        'order_delivered_customer_date': purchase + pd.to_timedelta(rng.gamma(2, 6, size=n_orders), unit='D'),
+        'review_score': rng.integers(1, 6, size=n_orders),
+    })
+    # Beberapa order punya lebih dari satu baris item
+    return pd.concat([frame, frame.sample(frac=0.3, random_state=seed)], ignore_index=True)
+
+
+def test_partitions_merge_matches_rows():
+    frame = orders_frame()
+    table = partition_sketches(frame)
+    months = aligned_months(table, '2017-03-01', '2017-05-31')
+    assert months == ['2017-03', '2017-04', '2017-05']
+
+    result = summary(table, months)
+    timestamp = frame['order_purchase_timestamp']
+    rows = frame[(timestamp >= '2017-03-01') & (timestamp < '2017-06-01')]
+    exact_orders = rows['order_id'].nunique()
+    assert abs(result['distinct_orders'] - exact_orders) / exact_orders <= HLL_TOLERANCE
+    delivery = (rows['order_delivered_customer_date'] - rows['order_purchase_timestamp']).dt.days
+    assert result['delivery_time']['count'] == len(rows)
+    assert abs(result['delivery_time']['median'] - delivery.median()) <= 1
+    assert result['delivery_time']['mean'] == pytest.approx(delivery.mean())
+
+
+def test_update_partitions_matches_rebuild():
+    frame = orders_frame()
+    base, batch = frame.iloc[:18_000], frame.iloc[18_000:]
+    updated = update_partitions(partition_sketches(base), batch)
+    rebuilt = partition_sketches(frame)
+    key = ['month', 'sketch']
+    assert sorted(updated[key].itertuples(index=False)) == sorted(rebuilt[key].itertuples(index=False))
+    incremental, full = summary(updated), summary(rebuilt)
+    # Register HyperLogLog identik, jadi perkiraan order unik juga identik
+    assert incremental['distinct_orders'] == full['distinct_orders']
+    assert incremental['distinct_customers'] == full['distinct_customers']
+    for name in ('delivery_time', 'delivery_time_bad', 'delivery_time_good'):
+        assert incremental[name]['count'] == full[name]['count']
+        assert abs(incremental[name]['median'] - full[name]['median']) <= 1
+
+
+def test_aligned_months():
+    table = pd.DataFrame({'month': ['2017-01', '2017-02', '2017-03', 'unknown']})
+    assert aligned_months(table) == ['2017-01', '2017-02', '2017-03']
+    assert aligned_months(table, start='2017-02-01') == ['2017-02', '2017-03']
+    assert aligned_months(table, end='2017-02-28') == ['2017-01', '2017-02']
+    # Rentang yang memotong bulan tidak bisa dijawab dari partisi
+    assert aligned_months(table, start='2017-02-15') is None
+    assert aligned_months(table, end='2017-02-27') is None